@@ -2,8 +2,11 @@ import streamlit as st
 import os
 import json
 import base64
+import threading
+import uuid
 from dotenv import load_dotenv
-from typing import List, Dict, Any, Tuple
+from contextlib import nullcontext
+from typing import List, Dict, Any, Tuple, Iterator
 import sys
 import os
 
@@ -14,86 +17,301 @@ from config.settings import (
     GEMINI_API_KEY,
     ELASTICSEARCH_URL,
     ELASTICSEARCH_API_KEY,
-    ELASTICSEARCH_INDEX_NAME
+    ELASTICSEARCH_INDEX_NAME,
+    APP_PROFILING,
+    CHAT_RECENT_MESSAGES,
+    COURSE_LIST_TTL,
+    PROFILE_DIFFICULTY_FOLLOW_UPS
 )
-from src.core.rag_engine import RAGEngine
-from src.core.indexer import Indexer
+from src.core.indexer import Indexer, IndexingError
 from src.core.retriever import Retriever
+from src.core.prefetch import RetrievalPrefetcher
 from src.ai.adaptive_generator import AdaptiveGenerator
+from src.ai.conversation import ConversationSession
 from src.processors.text_processor import TextProcessor
 from src.processors.pdf_processor import PDFProcessor
 from src.processors.image_processor import ImageProcessor
 from src.processors.audio_processor import AudioProcessor
-from src.data.models import Document
+from src.processors.base_processor import file_digest
+from src.data.profile_store import get_profile_store, signals_difficulty
+from src.data.variant_store import get_variant_store
+from src.utils.profiling import RerunProfiler
 
 load_dotenv()
 
-rag_engine = RAGEngine()
-indexer = Indexer()
-retriever = Retriever()
-adaptive_generator = AdaptiveGenerator()
-text_processor = TextProcessor()
-pdf_processor = PDFProcessor()
-image_processor = ImageProcessor()
-audio_processor = AudioProcessor()
+@st.cache_resource
+def load_components() -> Dict[str, Any]:
+    """Clientes e processadores criados uma vez por processo, e não a cada rerun do script.
+
+    Com o índice léxico vazio (instalação anterior a ele, ou arquivo apagado), os
+    documentos já indexados no Elasticsearch são copiados para ele em segundo plano.
+    """
+    retriever = Retriever()
+    if not len(retriever.lexical_index):
+        threading.Thread(target=retriever.rebuild_lexical_index, name="lexical-backfill", daemon=True).start()
+    return {
+        "indexer": Indexer(),
+        "retriever": retriever,
+        "adaptive_generator": AdaptiveGenerator(),
+        "text_processor": TextProcessor(),
+        "pdf_processor": PDFProcessor(),
+        "image_processor": ImageProcessor(),
+        "audio_processor": AudioProcessor(),
+    }
+
+@st.cache_data(ttl=COURSE_LIST_TTL, show_spinner=False)
+def indexed_courses() -> List[str]:
+    """Cursos com conteúdo no Elasticsearch, consultados no máximo a cada `COURSE_LIST_TTL` segundos"""
+    return load_components()["retriever"].list_courses()
+
+ALL_COURSES = "Todos os cursos"
+NEW_COURSE = "➕ Novo curso"
 
 class DataIndexer:
     """Classe responsável pela indexação de diferentes tipos de dados"""
     
     def __init__(self):
-        self.indexer_core = indexer
-        self.text_processor = text_processor
-        self.pdf_processor = pdf_processor
-        self.image_processor = image_processor
-        self.audio_processor = audio_processor
+        components = load_components()
+        self.indexer_core = components["indexer"]
+        self.text_processor = components["text_processor"]
+        self.pdf_processor = components["pdf_processor"]
+        self.image_processor = components["image_processor"]
+        self.audio_processor = components["audio_processor"]
 
-    def extract_text_from_pdf(self, pdf_file) -> str:
-        return self.pdf_processor.process(pdf_file.read())
-    
-    def transcribe_audio_with_whisper(self, audio_file) -> str:
-        return self.audio_processor.process(audio_file.read())
+    def extract_text_pieces(self, uploaded_file) -> Iterator[str]:
+        """Extrai o texto do arquivo de forma incremental, conforme o tipo"""
+        file_type = uploaded_file.type
+        if file_type in ("text/plain", "application/json"):
+            return self.text_processor.iter_text(uploaded_file)
+        if file_type == "application/pdf":
+            return self.pdf_processor.iter_text(uploaded_file)
+        if file_type.startswith("video/") or file_type.startswith("audio/"):
+            return self.audio_processor.iter_text(uploaded_file)
+        if file_type.startswith("image/"):
+            return self.image_processor.iter_text(uploaded_file, file_type)
+        return iter(())
     
-    def extract_text_from_image(self, image_file) -> str:
-        return self.image_processor.process(image_file.read(), image_file.type)
-    
-    def index_document(self, content: str, metadata: Dict[str, Any]) -> bool:
-        """Indexa documento no Elasticsearch usando o Indexer da nova arquitetura"""
-        try:
-            doc = Document(id=metadata.get("filename", "unknown"), content=content, metadata=metadata)
-            return self.indexer_core.index_document(doc)
-        except Exception as e:
-            st.error(f"Erro ao indexar documento: {e}")
-            return False
+    def index_upload(self, uploaded_file, course_id: str = None) -> int:
+        """Indexa o arquivo em chunks, em fluxo, no curso informado e retorna quantos chunks foram gravados.
+
+        Levanta `IndexingError` se o arquivo não for indexado por completo.
+        """
+        metadata = {
+            "filename": uploaded_file.name,
+            "type": uploaded_file.type,
+            "size": uploaded_file.size,
+            "source_version": file_digest(uploaded_file)
+        }
+        return self.indexer_core.index_stream(uploaded_file.name, self.extract_text_pieces(uploaded_file), metadata, course_id)
 
 class AdaptiveLearningSystem:
     """Sistema principal de aprendizagem adaptativa"""
     
     def __init__(self):
+        components = load_components()
         self.indexer = DataIndexer()
-        self.retriever = retriever
-        self.adaptive_generator = adaptive_generator
+        self.retriever = components["retriever"]
+        self.adaptive_generator = components["adaptive_generator"]
+        self.profile_store = get_profile_store()
+        self.variant_store = get_variant_store()
+        self.prefetcher = RetrievalPrefetcher(self.retriever)
+    
+    def prefetch(self, partial_query: str, content_type: str = None, mode: str = None, courses: List[str] = None):
+        """Antecipa, com debounce, embeddings e busca do texto ainda em digitação"""
+        self.prefetcher.prefetch(partial_query, content_type, courses, mode)
     
-    def search_content(self, query: str, content_type: str = None) -> List[Dict]:
+    def cancel_prefetch(self):
+        """Descarta a busca antecipada que não será usada"""
+        self.prefetcher.cancel()
+    
+    def search_content(self, query: str, content_type: str = None, mode: str = None, courses: List[str] = None) -> List[Dict]:
         """Busca conteúdo usando o Retriever da nova arquitetura"""
         try:
-            return self.retriever.retrieve_documents(query, content_type)
+            query_embeddings, prefetched_docs = self.prefetcher.take(query, content_type, courses, mode)
+            if prefetched_docs is not None:
+                return prefetched_docs[:5]
+            return self.retriever.retrieve_documents(query, content_type, query_embeddings=query_embeddings, mode=mode, courses=courses)
         except Exception as e:
             st.error(f"Erro na busca: {e}")
             return []
     
-    def generate_adaptive_content(self, user_profile: Dict, topic: str) -> Tuple[str, List[Dict]]:
+    def new_conversation(self) -> ConversationSession:
+        """Cria o estado de recuperação e histórico de uma sessão de chat"""
+        return ConversationSession(self.retriever)
+    
+    def load_profile(self, learner_id: str) -> Dict:
+        """Carrega o perfil persistido do aluno (servido do cache em memória)"""
+        return self.profile_store.get_profile(learner_id)
+    
+    def save_profile(self, learner_id: str, user_profile: Dict):
+        """Persiste nível e preferência do aluno em segundo plano"""
+        self.profile_store.save_profile(learner_id, user_profile['knowledge_level'], user_profile['learning_preference'])
+    
+    def record_turn(self, learner_id: str, question: str, answer: str, conversation: ConversationSession = None):
+        """Registra o turno e a dificuldade quando o aluno a sinaliza ou insiste no mesmo assunto.
+
+        Uma pergunta de acompanhamento isolada é parte normal da conversa; só a partir de
+        `PROFILE_DIFFICULTY_FOLLOW_UPS` perguntas seguidas sobre o mesmo assunto conta como dificuldade.
+        """
+        topic = conversation.topic if conversation is not None and conversation.topic else question
+        self.profile_store.record_interaction(learner_id, "user", question, topic)
+        self.profile_store.record_interaction(learner_id, "assistant", answer, topic)
+        insisting = conversation is not None and conversation.last_turn_reused and conversation.follow_ups >= PROFILE_DIFFICULTY_FOLLOW_UPS
+        if signals_difficulty(question) or insisting:
+            self.profile_store.record_difficulty(learner_id, topic[:120])
+    
+    def pregenerated_content(self, user_profile: Dict, query_embeddings: List[float], related_content_docs: List[Dict]):
+        """Retorna a explicação pré-gerada para o tópico e perfil, se houver uma atual"""
+        if not query_embeddings or user_profile.get('difficulties'):
+            return None
+        return self.variant_store.match(query_embeddings, user_profile, related_content_docs)
+    
+    def generate_adaptive_content(self, user_profile: Dict, topic: str, conversation: ConversationSession = None, learner_id: str = None, courses: List[str] = None) -> Tuple[str, List[Dict]]:
         """Gera conteúdo adaptativo usando o AdaptiveGenerator da nova arquitetura e retorna as fontes"""
         try:
-            related_content_docs = self.retriever.retrieve_documents(topic)
-            context = "\n".join([doc["content"] for doc in related_content_docs])
+            query_embeddings, prefetched_docs = self.prefetcher.take(topic, courses=courses)
+            if conversation is None:
+                if query_embeddings is None:
+                    query_embeddings = self.retriever.embed_query(topic)
+                if prefetched_docs is not None:
+                    related_content_docs = prefetched_docs[:5]
+                else:
+                    related_content_docs = self.retriever.retrieve_documents(topic, query_embeddings=query_embeddings, courses=courses)
+                history = None
+            else:
+                related_content_docs = conversation.retrieve(
+                    topic,
+                    courses=courses,
+                    query_embeddings=query_embeddings,
+                    candidates=prefetched_docs
+                )
+                # turnos que caíram no índice léxico não têm embeddings do assunto para casar variantes
+                query_embeddings = None if conversation.last_turn_reused or conversation.last_turn_fallback else conversation.topic_embeddings
+                history = conversation.messages()
+            
+            generated_response = self.pregenerated_content(user_profile, query_embeddings, related_content_docs)
+            if generated_response is None:
+                context = "\n".join([doc["content"] for doc in related_content_docs])
+                generated_response = self.adaptive_generator.generate_content(user_profile, topic, related_content=context, history=history)
+            
+            if conversation is not None:
+                conversation.add_turn("user", topic)
+                conversation.add_turn("assistant", generated_response)
             
-            generated_response = self.adaptive_generator.generate_content(user_profile, topic, related_content=context)
+            if learner_id:
+                self.record_turn(learner_id, topic, generated_response, conversation)
             
             return generated_response, related_content_docs
         except Exception as e:
             st.error(f"Erro ao gerar conteúdo adaptativo: {e}")
             return "Erro ao gerar conteúdo.", []
 
+def profiling_enabled() -> bool:
+    return APP_PROFILING or st.query_params.get("profile") == "1"
+
+def profiled(name: str):
+    """Mede a seção no rerun atual quando o perfilamento está ligado"""
+    profiler = st.session_state.get("profiler")
+    return profiler.section(name) if profiler is not None else nullcontext()
+
+def archived_history_markdown(messages: List[Dict], archived: int) -> str:
+    """Markdown das mensagens antigas, montado de forma incremental e guardado na sessão"""
+    cache = st.session_state.setdefault("history_cache", {"count": 0, "parts": [], "markdown": ""})
+    if cache["count"] > archived:
+        cache.update({"count": 0, "parts": [], "markdown": ""})
+    if cache["count"] < archived:
+        for message in messages[cache["count"]:archived]:
+            label = "**Você:**" if message["role"] == "user" else "**Tutor:**"
+            cache["parts"].append(f"{label} {message['content']}")
+        cache["count"] = archived
+        cache["markdown"] = "\n\n---\n\n".join(cache["parts"])
+    return cache["markdown"]
+
+def render_history(messages: List[Dict]):
+    """Mensagens recentes como balões de chat; as antigas num único bloco recolhido"""
+    archived = max(len(messages) - CHAT_RECENT_MESSAGES, 0)
+    if archived:
+        with st.expander(f"Mensagens anteriores ({archived})"):
+            st.markdown(archived_history_markdown(messages, archived))
+    for message in messages[archived:]:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+@st.fragment
+def render_indexing_tab(course: str):
+    st.header("📚 Indexação de Dados")
+    
+    uploaded_files = st.file_uploader(
+        "Faça upload dos seus materiais de estudo",
+        type=['txt', 'pdf', 'mp4', 'jpg', 'jpeg', 'png', 'json'],
+        accept_multiple_files=True
+    )
+    
+    if uploaded_files:
+        for uploaded_file in uploaded_files:
+            with st.expander(f"Processar: {uploaded_file.name}"):
+                if st.button(f"Indexar {uploaded_file.name}", key=f"index_{uploaded_file.name}"):
+                    with st.spinner("Processando arquivo..."):
+                        try:
+                            indexed_chunks = st.session_state.learning_system.indexer.index_upload(uploaded_file, course or None)
+                            st.success(f"✅ {uploaded_file.name} indexado com sucesso! ({indexed_chunks} trechos)")
+                            if course:
+                                indexed_courses.clear()
+                        except IndexingError as e:
+                            st.error(f"❌ Não foi possível indexar {uploaded_file.name} por completo: {e} ({e.indexed} trechos gravados)")
+
+@st.fragment
+def render_search_tab(course_scope: List[str]):
+    st.header("🔍 Busca de Conteúdo")
+    
+    col1, col2, col3 = st.columns([3, 1, 1])
+    
+    with col1:
+        search_query = st.text_input("Digite sua busca:")
+    
+    with col2:
+        content_filter = st.selectbox(
+            "Filtrar por tipo:",
+            ["Todos", "text/plain", "application/pdf", "video/mp4", "image/jpeg", "application/json"]
+        )
+    
+    with col3:
+        search_modes = {"Híbrida": "hybrid", "Híbrida com pré-filtro": "prefilter", "Palavras-chave (local)": "lexical"}
+        search_mode = st.selectbox("Modo de busca:", list(search_modes))
+    
+    search_all_courses = st.checkbox("Buscar em todos os cursos", value=course_scope is None, disabled=course_scope is None)
+    filter_type = None if content_filter == "Todos" else content_filter
+    search_courses = None if search_all_courses else course_scope
+    
+    if st.button("🔍 Buscar"):
+        if search_query:
+            with st.spinner("Buscando conteúdo..."):
+                results = st.session_state.learning_system.search_content(
+                    search_query,
+                    filter_type,
+                    search_modes[search_mode],
+                    search_courses
+                )
+                
+                if results:
+                    st.success(f"Encontrados {len(results)} resultados:")
+                    
+                    for i, result in enumerate(results):
+                        with st.expander(f"Resultado {i+1}: {result['metadata']['filename']}"):
+                            st.write("**Tipo:**", result['metadata']['type'])
+                            st.write("**Conteúdo:**")
+                            st.text(result['content'][:500] + "..." if len(result['content']) > 500 else result['content'])
+                else:
+                    st.warning("Nenhum resultado encontrado.")
+    elif search_query:
+        # a busca digitada já começa antes do clique em "Buscar"
+        st.session_state.learning_system.prefetch(search_query, filter_type, search_modes[search_mode], search_courses)
+
+def render_profiling(profiler: RerunProfiler, record: Dict[str, float]):
+    with st.sidebar.expander("⏱️ Perfil do rerun", expanded=True):
+        st.caption(f"Último rerun: {record['rerun']:.1f} ms · {len(profiler.reruns)} reruns medidos")
+        st.dataframe(profiler.summary(), hide_index=True)
+
 def main():
     st.set_page_config(
         page_title="Sistema de Aprendizagem Adaptativa",
@@ -101,23 +319,34 @@ def main():
         layout="wide"
     )
     
+    if profiling_enabled():
+        if 'profiler' not in st.session_state:
+            st.session_state.profiler = RerunProfiler()
+        st.session_state.profiler.start()
+    else:
+        st.session_state.pop('profiler', None)
+    
     st.title("🧠 Sistema de Aprendizagem Adaptativa")
     st.markdown("---")
     
-    if 'learning_system' not in st.session_state:
-        st.session_state.learning_system = AdaptiveLearningSystem()
-    
-    if 'user_profile' not in st.session_state:
-        st.session_state.user_profile = {
-            'knowledge_level': 'iniciante',
-            'learning_preference': 'texto',
-            'difficulties': []
-        }
+    with profiled("inicialização"):
+        if 'learning_system' not in st.session_state:
+            st.session_state.learning_system = AdaptiveLearningSystem()
     
-    with st.sidebar:
+    with st.sidebar, profiled("barra lateral"):
         st.header("⚙️ Configurações")
         
         st.subheader("Perfil do Usuário")
+        if 'default_learner_id' not in st.session_state:
+            st.session_state.default_learner_id = f"aluno-{uuid.uuid4().hex[:8]}"
+        learner_id = st.text_input(
+            "Identificador do Aluno",
+            value=st.session_state.default_learner_id,
+            help="Use sempre o mesmo identificador para retomar seu perfil em outra sessão"
+        ).strip() or st.session_state.default_learner_id
+        st.session_state.learner_id = learner_id
+        st.session_state.user_profile = st.session_state.learning_system.load_profile(learner_id)
+        
         knowledge_level = st.selectbox(
             "Nível de Conhecimento",
             ["iniciante", "intermediário", "avançado"],
@@ -134,62 +363,39 @@ def main():
             'knowledge_level': knowledge_level,
             'learning_preference': learning_preference
         })
+        st.session_state.learning_system.save_profile(learner_id, st.session_state.user_profile)
+        
+        if st.session_state.user_profile['difficulties']:
+            st.caption("Dificuldades registradas: " + ", ".join(st.session_state.user_profile['difficulties']))
+        
+        st.subheader("Curso")
+        selected_course = st.selectbox(
+            "Curso atual",
+            [ALL_COURSES, *indexed_courses(), NEW_COURSE],
+            help=f"“{ALL_COURSES}” usa o conteúdo de todos os cursos; escolha “{NEW_COURSE}” para indexar um curso ainda sem materiais"
+        )
+        if selected_course == NEW_COURSE:
+            course = st.text_input("Nome do novo curso").strip()
+        else:
+            course = "" if selected_course == ALL_COURSES else selected_course
+        course_scope = [course] if course else None
     
     tab1, tab2, tab3 = st.tabs(["📚 Indexação de Dados", "🤖 Chat Adaptativo", "🔍 Busca de Conteúdo"])
     
-    with tab1:
-        st.header("📚 Indexação de Dados")
-        
-        uploaded_files = st.file_uploader(
-            "Faça upload dos seus materiais de estudo",
-            type=['txt', 'pdf', 'mp4', 'jpg', 'jpeg', 'png', 'json'],
-            accept_multiple_files=True
-        )
-        
-        if uploaded_files:
-            for uploaded_file in uploaded_files:
-                with st.expander(f"Processar: {uploaded_file.name}"):
-                    if st.button(f"Indexar {uploaded_file.name}", key=f"index_{uploaded_file.name}"):
-                        with st.spinner("Processando arquivo..."):
-                            content = ""
-                            file_type = uploaded_file.type
-                            
-                            if file_type == "text/plain":
-                                content = text_processor.process(uploaded_file) # Usar o novo processador
-                            elif file_type == "application/pdf":
-                                content = st.session_state.learning_system.indexer.extract_text_from_pdf(uploaded_file)
-                            elif file_type.startswith("video/") or file_type.startswith("audio/"):
-                                content = st.session_state.learning_system.indexer.transcribe_audio_with_whisper(uploaded_file)
-                            elif file_type.startswith("image/"):
-                                content = st.session_state.learning_system.indexer.extract_text_from_image(uploaded_file)
-                            elif file_type == "application/json":
-                                json_data = json.load(uploaded_file)
-                                content = json.dumps(json_data, indent=2)
-                            
-                            metadata = {
-                                "filename": uploaded_file.name,
-                                "type": file_type,
-                                "size": uploaded_file.size
-                            }
-                            
-                            if content:
-                                success = st.session_state.learning_system.indexer.index_document(content, metadata)
-                                if success:
-                                    st.success(f"✅ {uploaded_file.name} indexado com sucesso!")
-                                else:
-                                    st.error(f"❌ Erro ao indexar {uploaded_file.name}")
-                            else:
-                                st.error("❌ Não foi possível extrair conteúdo do arquivo")
-    
-    with tab2:
+    with tab1, profiled("aba indexação"):
+        render_indexing_tab(course)
+    
+    with tab2, profiled("aba chat"):
         st.header("🤖 Chat Adaptativo")
         
         if 'messages' not in st.session_state:
             st.session_state.messages = []
         
-        for i, message in enumerate(st.session_state.messages):
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
+        if 'conversation' not in st.session_state:
+            st.session_state.conversation = st.session_state.learning_system.new_conversation()
+        
+        with profiled("histórico do chat"):
+            render_history(st.session_state.messages)
 
         if prompt := st.chat_input("Faça uma pergunta sobre o que você quer aprender..."):
 
@@ -198,10 +404,13 @@ def main():
                 st.markdown(prompt)
             
             with st.chat_message("assistant"):
-                with st.spinner("Gerando resposta adaptativa..."):
+                with st.spinner("Gerando resposta adaptativa..."), profiled("geração de resposta"):
                     response, sources = st.session_state.learning_system.generate_adaptive_content(
                         st.session_state.user_profile, 
-                        prompt
+                        prompt,
+                        st.session_state.conversation,
+                        st.session_state.learner_id,
+                        course_scope
                     )
 
                     st.markdown(response)
@@ -212,38 +421,11 @@ def main():
                     
                     st.session_state.messages.append({"role": "assistant", "content": response})
     
-    with tab3:
-        st.header("🔍 Busca de Conteúdo")
-        
-        col1, col2 = st.columns([3, 1])
-        
-        with col1:
-            search_query = st.text_input("Digite sua busca:")
-        
-        with col2:
-            content_filter = st.selectbox(
-                "Filtrar por tipo:",
-                ["Todos", "text/plain", "application/pdf", "video/mp4", "image/jpeg", "application/json"]
-            )
-        
-        if st.button("🔍 Buscar"):
-            if search_query:
-                with st.spinner("Buscando conteúdo..."):
-                    filter_type = None if content_filter == "Todos" else content_filter
-                    results = st.session_state.learning_system.search_content(search_query, filter_type)
-                    
-                    if results:
-                        st.success(f"Encontrados {len(results)} resultados:")
-                        
-                        for i, result in enumerate(results):
-                            with st.expander(f"Resultado {i+1}: {result['metadata']['filename']}"):
-                                st.write("**Tipo:**", result['metadata']['type'])
-                                st.write("**Conteúdo:**")
-                                st.text(result['content'][:500] + "..." if len(result['content']) > 500 else result['content'])
-                    else:
-                        st.warning("Nenhum resultado encontrado.")
+    with tab3, profiled("aba busca"):
+        render_search_tab(course_scope)
+    
+    if 'profiler' in st.session_state:
+        render_profiling(st.session_state.profiler, st.session_state.profiler.finish())
 
 if __name__ == "__main__":
     main()
-
-
@@ -0,0 +1,113 @@
+"""Vazão do APIClient contra um servidor local que impõe limite de taxa.
+
+Uso: python benchmarks/api_client_throughput.py
+"""
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import openai
+from src.utils.api_client import APIClient
+
+SERVER_RATE_LIMIT = 20
+REQUESTS = 120
+WORKERS = 16
+
+
+class MockEmbeddingsHandler(BaseHTTPRequestHandler):
+    window = deque()
+    lock = threading.Lock()
+    upstream_calls = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("content-length", 0)))
+        now = time.monotonic()
+        with self.lock:
+            while self.window and now - self.window[0] > 1.0:
+                self.window.popleft()
+            limited = len(self.window) >= SERVER_RATE_LIMIT
+            if not limited:
+                self.window.append(now)
+                MockEmbeddingsHandler.upstream_calls += 1
+
+        if limited:
+            payload = {"error": {"message": "Rate limit exceeded", "type": "requests"}}
+            self.send_response(429)
+        else:
+            time.sleep(0.02)
+            payload = {
+                "object": "list",
+                "model": json.loads(body)["model"],
+                "data": [{"object": "embedding", "index": 0, "embedding": [0.0] * 8}],
+                "usage": {"prompt_tokens": 1, "total_tokens": 1},
+            }
+            self.send_response(200)
+        data = json.dumps(payload).encode()
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def run(label, embed, queries):
+    MockEmbeddingsHandler.upstream_calls = 0
+    MockEmbeddingsHandler.window.clear()
+    time.sleep(1.0)
+    failures = 0
+    started = time.perf_counter()
+
+    def task(query):
+        try:
+            embed(query)
+            return True
+        except Exception:
+            return False
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(task, queries))
+    elapsed = time.perf_counter() - started
+    failures = results.count(False)
+    ok = len(results) - failures
+    print(
+        f"{label:<28} ok={ok:<4} falhas={failures:<4} chamadas_upstream={MockEmbeddingsHandler.upstream_calls:<4} "
+        f"tempo={elapsed:6.2f}s vazão={ok / elapsed:6.1f} req/s"
+    )
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockEmbeddingsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    openai_client = openai.OpenAI(api_key="mock", base_url=base_url, max_retries=0)
+    model = "text-embedding-ada-002"
+
+    def direct(query):
+        return openai_client.embeddings.create(model=model, input=query)
+
+    api_client = APIClient(rate_limits={model: (SERVER_RATE_LIMIT * 0.9, 5)})
+
+    def resilient(query):
+        return api_client.call(model, openai_client.embeddings.create, model=model, input=query, coalesce_key=query)
+
+    unique_queries = [f"consulta {i}" for i in range(REQUESTS)]
+    repeated_queries = [f"consulta {i % 10}" for i in range(REQUESTS)]
+
+    print(f"Servidor mock: limite de {SERVER_RATE_LIMIT} req/s, {REQUESTS} requisições, {WORKERS} threads")
+    run("direto (sem camada)", direct, unique_queries)
+    run("APIClient", resilient, unique_queries)
+    run("APIClient (repetidas)", resilient, repeated_queries)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Duração do rerun do app Streamlit numa sessão de chat longa.
+
+Executa `app/app.py` com o `AppTest` do Streamlit (sem navegador), preenche o histórico
+com mensagens sintéticas e mede o tempo de reruns consecutivos. Nenhuma chamada de rede
+é feita: um rerun sem interação no chat não consulta embeddings, Elasticsearch ou LLM.
+
+Uso: [APP_PROFILING=1] python benchmarks/app_rerun.py [--messages 200] [--reruns 20] [--app app/app.py]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import sys
+import os
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+MESSAGE = (
+    "Em HTML5, a tag **section** agrupa conteúdo relacionado e a tag **article** representa um "
+    "conteúdo independente. Listas ordenadas usam `ol` e não ordenadas usam `ul`; cada item fica "
+    "em `li`. Tabelas combinam `table`, `tr`, `td` e o atributo `colspan` para mesclar colunas. "
+)
+
+
+def synthetic_messages(count: int):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Mensagem {i}. " + MESSAGE * (1 if i % 2 == 0 else 4)}
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--app", default=os.path.join(ROOT, "app", "app.py"))
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp()
+    os.environ.setdefault("ELASTICSEARCH_URL", "http://localhost:9200")
+    os.environ.setdefault("ELASTICSEARCH_INDEX_NAME", "benchmark")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["PROFILE_DB_PATH"] = os.path.join(data_dir, "profiles.db")
+    os.environ["VARIANT_DB_PATH"] = os.path.join(data_dir, "variants.db")
+    os.environ["LEXICAL_INDEX_PATH"] = os.path.join(data_dir, "lexical_index.json")
+
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.abspath(args.app), default_timeout=120)
+    at.session_state["messages"] = synthetic_messages(args.messages)
+    started = time.perf_counter()
+    at.run()
+    first_ms = (time.perf_counter() - started) * 1000
+    if at.exception:
+        raise SystemExit(f"Erro ao executar o app: {at.exception[0].message}")
+
+    durations = []
+    for _ in range(args.reruns):
+        started = time.perf_counter()
+        at.run()
+        durations.append((time.perf_counter() - started) * 1000)
+    durations.sort()
+
+    print(f"app: {os.path.relpath(args.app, ROOT)}")
+    print(f"mensagens no histórico: {args.messages}")
+    print(f"elementos renderizados: {len(list(at.main)) + len(list(at.sidebar))}")
+    print(f"primeiro rerun: {first_ms:.1f} ms")
+    print(f"reruns seguintes ({args.reruns}): média {statistics.mean(durations):.1f} ms, "
+          f"p50 {durations[len(durations) // 2]:.1f} ms, p95 {durations[min(len(durations) - 1, int(len(durations) * 0.95))]:.1f} ms")
+
+    if "profiler" in at.session_state:
+        print("\nseções (APP_PROFILING=1):")
+        for row in at.session_state["profiler"].summary():
+            print(f"  {row['seção']:<22} média {row['média ms']:>7.1f} ms  p95 {row['p95 ms']:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
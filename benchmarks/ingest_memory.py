@@ -0,0 +1,157 @@
+"""Pico de memória (RSS) da ingestão: caminho antigo (tudo em memória) vs. fluxo em chunks.
+
+Gera PDFs e arquivos de mídia sintéticos de tamanhos crescentes e mede cada caso em um
+subprocesso próprio, para que o pico de um não contamine o outro.
+
+A coluna "fluxo+léxico" é a configuração do app: cada chunk também entra no índice
+léxico em memória, que guarda o texto para servir de fallback sem o Elasticsearch. Essa
+parte cresce com o texto extraído (cerca de +24 MB num PDF de 4000 páginas, contra
++5 MB sem o índice léxico); o restante da ingestão fica estável.
+
+Uso: python benchmarks/ingest_memory.py [--pages 250 1000 4000] [--media-mb 32 128 512]
+"""
+import argparse
+import base64
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("ELASTICSEARCH_URL", "http://localhost:9200")
+
+PARAGRAPH = (
+    "HTML5 define a estrutura de uma página web com elementos semânticos como header, nav, "
+    "section, article e footer. Listas ordenadas e não ordenadas, tabelas com colspan e "
+    "âncoras com a tag a href compõem o conteúdo. "
+)
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_pdf(path: str, pages: int):
+    import pymupdf
+    doc = pymupdf.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), f"Página {number}. " + PARAGRAPH * 14, fontsize=8)
+    doc.save(path)
+    doc.close()
+
+
+def make_media(path: str, megabytes: int):
+    with open(path, "wb") as f:
+        for _ in range(megabytes):
+            f.write(os.urandom(1024 * 1024))
+
+
+def legacy_pdf(path: str):
+    from src.data.models import Document
+    from src.core.hashing_embedder import HashingEmbeddingEngine
+    import pymupdf
+
+    with open(path, "rb") as f:
+        file_content = f.read()
+    doc = pymupdf.open(stream=file_content, filetype="pdf")
+    text = ""
+    for page in doc:
+        text += page.get_text()
+    doc.close()
+    document = Document(id=os.path.basename(path), content=text, metadata={"filename": os.path.basename(path)})
+    doc_to_index = document.model_dump()
+    doc_to_index["embeddings"] = HashingEmbeddingEngine().generate_embeddings(text)
+    json.dumps(doc_to_index)
+
+
+def streaming_pdf(path: str, lexical: bool = False):
+    from src.core.indexer import Indexer
+    from src.core.hashing_embedder import HashingEmbeddingEngine
+    from src.core.lexical_index import LexicalIndex
+    from src.processors.pdf_processor import PDFProcessor
+
+    indexer = Indexer(rag_engine=HashingEmbeddingEngine(), lexical_index=LexicalIndex(), update_lexical_index=lexical)
+    with open(path, "rb") as f:
+        for action in indexer.iter_actions(os.path.basename(path), PDFProcessor().iter_text(f), {"filename": os.path.basename(path)}):
+            json.dumps(action)
+            if lexical:
+                # como em `index_stream` quando o Elasticsearch confirma o chunk
+                indexer.lexical_index.add(action["_id"], action["_source"]["content"], action["_source"]["metadata"])
+
+
+def streaming_pdf_lexical(path: str):
+    streaming_pdf(path, lexical=True)
+
+
+def legacy_media(path: str):
+    with open(path, "rb") as f:
+        file_content = f.read()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp_file:
+        tmp_file.write(file_content)
+    os.unlink(tmp_file.name)
+    base64.b64encode(file_content).decode()
+
+
+def streaming_media(path: str):
+    from src.processors.base_processor import file_digest, local_path
+
+    with open(path, "rb") as f:
+        file_digest(f)
+        with local_path(f, suffix=".mp4"):
+            pass
+
+
+CASES = {
+    "legacy-pdf": legacy_pdf,
+    "streaming-pdf": streaming_pdf,
+    "streaming-pdf-lexical": streaming_pdf_lexical,
+    "legacy-media": legacy_media,
+    "streaming-media": streaming_media,
+}
+
+
+def measure(case: str, path: str) -> float:
+    output = subprocess.run(
+        [sys.executable, __file__, "--case", case, path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[250, 1000, 4000])
+    parser.add_argument("--media-mb", type=int, nargs="+", default=[32, 128, 512])
+    parser.add_argument("--case", choices=list(CASES))
+    parser.add_argument("path", nargs="?")
+    args = parser.parse_args()
+
+    if args.case:
+        CASES[args.case](args.path)
+        print(f"{peak_rss_mb():.1f}")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'arquivo':<22} {'tamanho MB':>11} {'antigo MB':>10} {'fluxo MB':>9} {'fluxo+léxico MB':>16}")
+        for pages in args.pages:
+            path = os.path.join(directory, f"sintetico-{pages}.pdf")
+            make_pdf(path, pages)
+            size = os.path.getsize(path) / 1024 / 1024
+            print(
+                f"{'PDF ' + str(pages) + ' páginas':<22} {size:>11.1f} {measure('legacy-pdf', path):>10.1f} "
+                f"{measure('streaming-pdf', path):>9.1f} {measure('streaming-pdf-lexical', path):>16.1f}"
+            )
+            os.unlink(path)
+        for megabytes in args.media_mb:
+            path = os.path.join(directory, f"sintetico-{megabytes}.mp4")
+            make_media(path, megabytes)
+            print(f"{'mídia ' + str(megabytes) + ' MB':<22} {megabytes:>11.1f} {measure('legacy-media', path):>10.1f} {measure('streaming-media', path):>9.1f}")
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,4 +9,84 @@ ELASTICSEARCH_URL = os.getenv("ELASTICSEARCH_URL")
 ELASTICSEARCH_API_KEY = os.getenv("ELASTICSEARCH_API_KEY")
 ELASTICSEARCH_INDEX_NAME = os.getenv("ELASTICSEARCH_INDEX_NAME")
 
+API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "4"))
+API_RETRY_BASE_DELAY = float(os.getenv("API_RETRY_BASE_DELAY", "0.5"))
+API_RETRY_MAX_DELAY = float(os.getenv("API_RETRY_MAX_DELAY", "20"))
+API_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("API_CIRCUIT_FAILURE_THRESHOLD", "5"))
+API_CIRCUIT_RESET_TIMEOUT = float(os.getenv("API_CIRCUIT_RESET_TIMEOUT", "30"))
 
+# Limites por modelo: (requisições por segundo, rajada máxima)
+API_RATE_LIMITS = {
+    "text-embedding-ada-002": (50.0, 50),
+    "text-embedding-3-small": (50.0, 50),
+    "gpt-3.5-turbo": (5.0, 10),
+    "whisper-1": (0.8, 2),
+    "gemini-1.5-flash": (0.25, 2),
+}
+API_DEFAULT_RATE_LIMIT = (5.0, 5)
+
+CONVERSATION_DRIFT_THRESHOLD = float(os.getenv("CONVERSATION_DRIFT_THRESHOLD", "0.85"))
+CONVERSATION_CANDIDATE_POOL = int(os.getenv("CONVERSATION_CANDIDATE_POOL", "20"))
+CONVERSATION_HISTORY_TOKEN_BUDGET = int(os.getenv("CONVERSATION_HISTORY_TOKEN_BUDGET", "800"))
+
+PROFILE_DB_PATH = os.getenv("PROFILE_DB_PATH", "data/profiles.db")
+PROFILE_WRITE_BATCH_SIZE = int(os.getenv("PROFILE_WRITE_BATCH_SIZE", "50"))
+PROFILE_WRITE_FLUSH_INTERVAL = float(os.getenv("PROFILE_WRITE_FLUSH_INTERVAL", "0.5"))
+PROFILE_DIFFICULTY_FOLLOW_UPS = int(os.getenv("PROFILE_DIFFICULTY_FOLLOW_UPS", "2"))
+
+VARIANT_DB_PATH = os.getenv("VARIANT_DB_PATH", "data/variants.db")
+VARIANT_MATCH_THRESHOLD = float(os.getenv("VARIANT_MATCH_THRESHOLD", "0.9"))
+PREGEN_CONCURRENCY = int(os.getenv("PREGEN_CONCURRENCY", "4"))
+PREGEN_MAX_REQUESTS = int(os.getenv("PREGEN_MAX_REQUESTS", "200"))
+PREGEN_TOKEN_BUDGET = int(os.getenv("PREGEN_TOKEN_BUDGET", "400000"))
+PREGEN_CONTEXT_TOKENS = int(os.getenv("PREGEN_CONTEXT_TOKENS", "1500"))
+
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "data/lexical_index.json")
+RETRIEVER_EMBEDDING_TIMEOUT = float(os.getenv("RETRIEVER_EMBEDDING_TIMEOUT", "5"))
+RETRIEVER_ES_TIMEOUT = float(os.getenv("RETRIEVER_ES_TIMEOUT", "5"))
+RETRIEVER_PREFILTER_SIZE = int(os.getenv("RETRIEVER_PREFILTER_SIZE", "50"))
+
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "2000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "16"))
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "64"))
+STREAM_BLOCK_SIZE = int(os.getenv("STREAM_BLOCK_SIZE", str(1024 * 1024)))
+
+# "index": um índice por curso; "routing": índice único com routing por curso
+COURSE_ROUTING_STRATEGY = os.getenv("COURSE_ROUTING_STRATEGY", "index")
+
+PREFETCH_DEBOUNCE_SECONDS = float(os.getenv("PREFETCH_DEBOUNCE_SECONDS", "0.3"))
+PREFETCH_MIN_CHARS = int(os.getenv("PREFETCH_MIN_CHARS", "8"))
+PREFETCH_MATCH_THRESHOLD = float(os.getenv("PREFETCH_MATCH_THRESHOLD", "0.9"))
+PREFETCH_MAX_AGE = float(os.getenv("PREFETCH_MAX_AGE", "60"))
+PREFETCH_WAIT_TIMEOUT = float(os.getenv("PREFETCH_WAIT_TIMEOUT", "10"))
+
+# Modelos de embedding: provedor, dimensão do vetor e alias do índice servido por cada um.
+# A busca e a indexação usam sempre o alias do modelo ativo, então vetores de dimensões
+# diferentes nunca se misturam; `python -m src.core.reindex` popula e troca o alias.
+EMBEDDING_MODELS = {
+    "text-embedding-ada-002": {
+        "provider": "openai",
+        "dimensions": 1536,
+        "index_alias": ELASTICSEARCH_INDEX_NAME,
+    },
+    "text-embedding-3-small": {
+        "provider": "openai",
+        "dimensions": 512,
+        "request_dimensions": True,
+        "index_alias": f"{ELASTICSEARCH_INDEX_NAME}-3-small",
+    },
+    "local-hashing-256": {
+        "provider": "hashing",
+        "dimensions": 256,
+        "index_alias": f"{ELASTICSEARCH_INDEX_NAME}-local-256",
+    },
+}
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+REINDEX_BATCH_SIZE = int(os.getenv("REINDEX_BATCH_SIZE", "64"))
+
+# Perfilamento do app Streamlit: também pode ser ligado com ?profile=1 na URL
+APP_PROFILING = os.getenv("APP_PROFILING", "false").lower() in ("1", "true", "yes")
+PROFILING_HISTORY_SIZE = int(os.getenv("PROFILING_HISTORY_SIZE", "50"))
+CHAT_RECENT_MESSAGES = int(os.getenv("CHAT_RECENT_MESSAGES", "20"))
+COURSE_LIST_TTL = int(os.getenv("COURSE_LIST_TTL", "60"))
@@ -1,25 +1,38 @@
 import openai
-from typing import Dict
+from typing import Dict, List
+import json
 import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from src.utils.api_client import get_api_client
+
+CHAT_MODEL = "gpt-3.5-turbo"
+MAX_COMPLETION_TOKENS = 1000
+GENERATION_ERROR_MESSAGE = "Erro ao gerar conteúdo."
+
 class AdaptiveGenerator:
     def __init__(self):
-        self.openai_client = openai.OpenAI()
+        self.openai_client = openai.OpenAI(max_retries=0)
+        self.api_client = get_api_client()
 
-    def generate_content(self, user_profile: Dict, topic: str, related_content: str = "") -> str:
+    def generate_content(self, user_profile: Dict, topic: str, related_content: str = "", history: List[Dict] = None) -> str:
         knowledge_level = user_profile.get("knowledge_level", "iniciante")
         learning_preference = user_profile.get("learning_preference", "texto")
         difficulties = user_profile.get("difficulties", [])
+        interactions = user_profile.get("interactions", 0)
 
         interactive_prompt_part = ""
-        if not difficulties: 
+        if not difficulties and not interactions: 
             interactive_prompt_part = f"""
 Para entender melhor suas necessidades, por favor, responda:
 1. Qual aspecto de \'{topic}\' você considera mais desafiador ou confuso?
 2. Você prefere aprender este tópico através de um texto explicativo, um resumo em áudio, ou um infográfico/vídeo curto?
+"""
+        elif not difficulties:
+            interactive_prompt_part = f"""
+Ao final, pergunte qual aspecto de \'{topic}\' o usuário considera mais desafiador, para aprofundar nos próximos turnos.
 """
         else:
             interactive_prompt_part = f"""
@@ -52,18 +65,21 @@ Exemplo de formato de resposta para vídeo/áudio:
 Por favor, comece sua resposta com o conteúdo original relevante e, em seguida, a explicação direta do tópico, e se for o caso, adicione a sugestão de formato no final.
 """
         
+        messages = [{"role": "system", "content": prompt}] + (history or [])
+
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": prompt}
-                ],
-                max_tokens=1000
+            response = self.api_client.call(
+                CHAT_MODEL,
+                self.openai_client.chat.completions.create,
+                model=CHAT_MODEL,
+                messages=messages,
+                max_tokens=MAX_COMPLETION_TOKENS,
+                coalesce_key=json.dumps(messages, sort_keys=True)
             )
             
             return response.choices[0].message.content
         except Exception as e:
             print(f"Erro ao gerar conteúdo adaptativo: {e}")
-            return "Erro ao gerar conteúdo."
+            return GENERATION_ERROR_MESSAGE
 
 
@@ -0,0 +1,159 @@
+import re
+from typing import Dict, List
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from config.settings import (
+    CONVERSATION_DRIFT_THRESHOLD,
+    CONVERSATION_CANDIDATE_POOL,
+    CONVERSATION_HISTORY_TOKEN_BUDGET
+)
+from src.utils.vectors import cosine_similarity
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def clip_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else text[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+def first_sentence(text: str) -> str:
+    return re.split(r"(?<=[.!?])\s+", text.strip(), maxsplit=1)[0]
+
+
+class ConversationSession:
+    """Estado de uma sessão de chat: candidatos recuperados e histórico resumido.
+
+    Perguntas de acompanhamento reaproveitam os candidatos do turno anterior e só
+    voltam ao Elasticsearch quando o assunto se afasta além de `drift_threshold`;
+    `follow_ups` conta as perguntas seguidas sobre o mesmo assunto. Sem embeddings da
+    consulta, o turno usa o índice léxico (`last_turn_fallback`) e o assunto anterior é
+    descartado.
+    """
+
+    def __init__(
+        self,
+        retriever,
+        drift_threshold: float = CONVERSATION_DRIFT_THRESHOLD,
+        candidate_pool: int = CONVERSATION_CANDIDATE_POOL,
+        history_token_budget: int = CONVERSATION_HISTORY_TOKEN_BUDGET,
+        top_k: int = 5,
+        min_score: float = 1.0
+    ):
+        self.retriever = retriever
+        self.drift_threshold = drift_threshold
+        self.candidate_pool = candidate_pool
+        self.history_token_budget = history_token_budget
+        self.top_k = top_k
+        self.min_score = min_score
+
+        self.topic = ""
+        self.topic_embeddings: List[float] = []
+        self.last_turn_reused = False
+        self.last_turn_fallback = False
+        self.follow_ups = 0
+        self.content_type = None
+        self.courses = None
+        self.candidates: List[Dict] = []
+        self.history: List[Dict] = []
+        self.summary = ""
+        self.stats = {"retrievals": 0, "reuses": 0}
+
+    def _can_reuse(self, query_embeddings: List[float], content_type: str, courses: List[str]) -> bool:
+        return (
+            bool(self.candidates)
+            and content_type == self.content_type
+            and courses == self.courses
+            and cosine_similarity(query_embeddings, self.topic_embeddings) >= self.drift_threshold
+        )
+
+    def _rank_candidates(self, query_embeddings: List[float]) -> List[Dict]:
+        scored = []
+        for doc in self.candidates:
+            score = cosine_similarity(query_embeddings, doc.get("embeddings", [])) + 1.0
+            if score >= self.min_score:
+                scored.append((score, doc))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [doc for _, doc in scored[:self.top_k]]
+
+    def retrieve(
+        self,
+        query: str,
+        content_type: str = None,
+        courses: List[str] = None,
+        query_embeddings: List[float] = None,
+        candidates: List[Dict] = None
+    ) -> List[Dict]:
+        """`query_embeddings` e `candidates` permitem aproveitar uma busca antecipada"""
+        if query_embeddings is None:
+            query_embeddings = self.retriever.embed_query(query)
+        if not query_embeddings:
+            self._forget_topic()
+            self.last_turn_fallback = True
+            return self.retriever.fallback_search(query, content_type, self.top_k, courses)
+
+        self.last_turn_fallback = False
+        self.last_turn_reused = self._can_reuse(query_embeddings, content_type, courses)
+        if self.last_turn_reused:
+            self.follow_ups += 1
+            self.stats["reuses"] += 1
+            return self._rank_candidates(query_embeddings)
+
+        if candidates is None:
+            candidates = self.retriever.retrieve_documents(
+                query,
+                content_type,
+                query_embeddings=query_embeddings,
+                size=self.candidate_pool,
+                courses=courses
+            )
+        self.candidates = candidates
+        self.topic = query
+        self.topic_embeddings = query_embeddings
+        self.follow_ups = 0
+        self.content_type = content_type
+        self.courses = courses
+        self.stats["retrievals"] += 1
+        return self._rank_candidates(query_embeddings)
+
+    def add_turn(self, role: str, content: str):
+        self.history.append({"role": role, "content": clip_to_tokens(content, self.history_token_budget // 4)})
+        self._compact()
+
+    def _history_tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(estimate_tokens(turn["content"]) for turn in self.history)
+
+    def _compact(self):
+        while len(self.history) > 2 and self._history_tokens() > self.history_token_budget:
+            turn = self.history.pop(0)
+            label = "Usuário" if turn["role"] == "user" else "Tutor"
+            self.summary = f"{self.summary}\n- {label}: {first_sentence(turn['content'])}".strip()
+        summary_budget = self.history_token_budget // 4
+        while estimate_tokens(self.summary) > summary_budget and "\n" in self.summary:
+            self.summary = self.summary.split("\n", 1)[1]
+
+    def messages(self) -> List[Dict]:
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"Resumo da conversa até aqui:\n{self.summary}"})
+        return messages + self.history
+
+    def _forget_topic(self):
+        self.topic = ""
+        self.topic_embeddings = []
+        self.last_turn_reused = False
+        self.follow_ups = 0
+        self.content_type = None
+        self.courses = None
+        self.candidates = []
+
+    def reset(self):
+        self._forget_topic()
+        self.last_turn_fallback = False
+        self.history = []
+        self.summary = ""
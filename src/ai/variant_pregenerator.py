@@ -0,0 +1,178 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from config.settings import (
+    PREGEN_CONCURRENCY,
+    PREGEN_MAX_REQUESTS,
+    PREGEN_TOKEN_BUDGET,
+    PREGEN_CONTEXT_TOKENS
+)
+from src.ai.adaptive_generator import AdaptiveGenerator, MAX_COMPLETION_TOKENS, GENERATION_ERROR_MESSAGE
+from src.ai.conversation import clip_to_tokens, estimate_tokens
+from src.core.retriever import Retriever
+from src.data.variant_store import VariantStore, get_variant_store, document_source, chunk_key, profile_buckets
+from src.utils.vectors import mean_vector
+
+PROMPT_OVERHEAD_TOKENS = 600
+SAVE_BATCH_SIZE = 20
+
+
+class VariantPregenerator:
+    """Pré-gera explicações para cada tópico indexado e cada combinação de perfil.
+
+    Só gera variantes ausentes para a versão atual da fonte e respeita um limite de
+    requisições e de tokens estimados por execução.
+    """
+
+    def __init__(
+        self,
+        retriever: Retriever,
+        generator: AdaptiveGenerator,
+        store: VariantStore,
+        concurrency: int = PREGEN_CONCURRENCY,
+        max_requests: int = PREGEN_MAX_REQUESTS,
+        token_budget: int = PREGEN_TOKEN_BUDGET,
+        context_tokens: int = PREGEN_CONTEXT_TOKENS
+    ):
+        self.retriever = retriever
+        self.generator = generator
+        self.store = store
+        self.concurrency = concurrency
+        self.max_requests = max_requests
+        self.token_budget = token_budget
+        self.context_tokens = context_tokens
+
+    def sections(self, chunks: List[Tuple[int, str, str, List[float]]]) -> List[List[Tuple[int, str, str, List[float]]]]:
+        """Agrupa chunks consecutivos em seções cujo contexto cabe em `context_tokens`"""
+        sections, current, tokens = [], [], 0
+        for chunk in chunks:
+            cost = estimate_tokens(chunk[2])
+            if current and tokens + cost > self.context_tokens:
+                sections.append(current)
+                current, tokens = [], 0
+            current.append(chunk)
+            tokens += cost
+        if current:
+            sections.append(current)
+        return sections
+
+    def discover_topics(self) -> List[Dict]:
+        """Um tópico por seção de cada fonte, para que o contexto cubra os chunks que representa"""
+        sources = {}
+        for doc in self.retriever.scan_documents():
+            if not doc.get("content") or not doc.get("embeddings"):
+                continue
+            source_id, source_version = document_source(doc)
+            metadata = doc.get("metadata", {})
+            source = sources.setdefault(source_id, {
+                "title": os.path.splitext(metadata.get("filename", source_id))[0],
+                "source_version": source_version,
+                "chunks": [],
+            })
+            source["chunks"].append((metadata.get("chunk", 0), chunk_key(doc), doc["content"], doc["embeddings"]))
+
+        topics = []
+        for source_id, source in sources.items():
+            sections = self.sections(sorted(source["chunks"], key=lambda chunk: chunk[0]))
+            for number, section in enumerate(sections):
+                title = source["title"] if len(sections) == 1 else f"{source['title']} (parte {number + 1})"
+                topics.append({
+                    "topic_id": f"{source_id}@{section[0][0]}",
+                    "title": title,
+                    "source_version": source["source_version"],
+                    "chunks": [key for _, key, _, _ in section],
+                    "embeddings": mean_vector([embeddings for _, _, _, embeddings in section]),
+                    "context": clip_to_tokens("\n".join(content for _, _, content, _ in section), self.context_tokens),
+                })
+        return topics
+
+    def plan(self, topics: List[Dict]) -> Dict:
+        jobs, skipped, estimated_tokens = [], 0, 0
+        for topic in topics:
+            cost = estimate_tokens(topic["context"]) + PROMPT_OVERHEAD_TOKENS + MAX_COMPLETION_TOKENS
+            for level, preference in profile_buckets():
+                if self.store.has_variant(topic["topic_id"], topic["source_version"], level, preference):
+                    continue
+                if len(jobs) >= self.max_requests or estimated_tokens + cost > self.token_budget:
+                    skipped += 1
+                    continue
+                jobs.append((topic, level, preference))
+                estimated_tokens += cost
+        return {"jobs": jobs, "skipped": skipped, "estimated_tokens": estimated_tokens}
+
+    def _generate(self, topic: Dict, level: str, preference: str) -> str:
+        profile = {
+            "knowledge_level": level,
+            "learning_preference": preference,
+            "difficulties": [],
+            "interactions": 1,
+        }
+        return self.generator.generate_content(profile, topic["title"], related_content=topic["context"])
+
+    def run(self, dry_run: bool = False) -> Dict:
+        topics = self.discover_topics()
+        plan = self.plan(topics)
+        stats = {
+            "topics": len(topics),
+            "planned": len(plan["jobs"]),
+            "skipped_by_budget": plan["skipped"],
+            "estimated_tokens": plan["estimated_tokens"],
+            "generated": 0,
+            "failed": 0,
+        }
+        if dry_run:
+            return stats
+
+        for topic in topics:
+            self.store.save_topic(topic["topic_id"], topic["title"], topic["source_version"], topic["embeddings"], topic["chunks"])
+
+        rows = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {
+                pool.submit(self._generate, topic, level, preference): (topic, level, preference)
+                for topic, level, preference in plan["jobs"]
+            }
+            for future in as_completed(futures):
+                topic, level, preference = futures[future]
+                content = future.result()
+                if not content or content == GENERATION_ERROR_MESSAGE:
+                    stats["failed"] += 1
+                    continue
+                rows.append((topic["topic_id"], topic["source_version"], level, preference, content))
+                stats["generated"] += 1
+                if len(rows) >= SAVE_BATCH_SIZE:
+                    self.store.save_variants(rows)
+                    rows = []
+        if rows:
+            self.store.save_variants(rows)
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pré-gera conteúdo adaptativo por tópico e perfil")
+    parser.add_argument("--dry-run", action="store_true", help="apenas mostra o plano e o custo estimado")
+    parser.add_argument("--concurrency", type=int, default=PREGEN_CONCURRENCY)
+    parser.add_argument("--max-requests", type=int, default=PREGEN_MAX_REQUESTS)
+    parser.add_argument("--token-budget", type=int, default=PREGEN_TOKEN_BUDGET)
+    args = parser.parse_args()
+
+    pregenerator = VariantPregenerator(
+        Retriever(),
+        AdaptiveGenerator(),
+        get_variant_store(),
+        concurrency=args.concurrency,
+        max_requests=args.max_requests,
+        token_budget=args.token_budget
+    )
+    stats = pregenerator.run(dry_run=args.dry_run)
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from itertools import islice
+from typing import Iterable, Iterator, List
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from config.settings import CHUNK_SIZE, CHUNK_OVERLAP
+
+
+def chunk_text(pieces: Iterable[str], chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> Iterator[str]:
+    """Agrupa trechos de texto em chunks de até `chunk_size` caracteres com sobreposição.
+
+    O buffer nunca passa de `chunk_size` mais o tamanho do trecho recebido, então a memória
+    usada não depende do tamanho total do documento.
+    """
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        while len(buffer) >= chunk_size:
+            cut = buffer.rfind(" ", chunk_size // 2, chunk_size)
+            if cut <= 0:
+                cut = chunk_size
+            chunk = buffer[:cut].strip()
+            if chunk:
+                yield chunk
+            start = buffer.find(" ", max(0, cut - overlap), cut)
+            buffer = buffer[start + 1 if start >= 0 else cut:]
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
@@ -0,0 +1,62 @@
+import re
+from typing import Dict, List, Optional
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from config.settings import COURSE_ROUTING_STRATEGY
+from src.core.lexical_index import strip_accents
+
+COURSE_STRATEGIES = ("index", "routing")
+
+
+def course_slug(course_id: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", strip_accents(course_id.lower())).strip("-")
+    if not slug:
+        raise ValueError(f"Identificador de curso inválido: {course_id!r}")
+    return slug
+
+
+class CourseScope:
+    """Decide em qual índice e shard cada curso é gravado e consultado.
+
+    Na estratégia "index" cada curso tem o próprio índice (`<base>-course-<slug>`); na
+    "routing" todos ficam no índice base e o curso é usado como chave de routing, o que
+    direciona a consulta a um único shard.
+    """
+
+    def __init__(self, base_index: str, strategy: str = COURSE_ROUTING_STRATEGY):
+        if strategy not in COURSE_STRATEGIES:
+            raise ValueError(f"Estratégia de curso inválida: {strategy}")
+        self.base_index = base_index
+        self.strategy = strategy
+
+    def course_index_pattern(self) -> str:
+        return f"{self.base_index}-course-*"
+
+    def index_for(self, course_id: Optional[str]) -> str:
+        if course_id and self.strategy == "index":
+            return f"{self.base_index}-course-{course_slug(course_id)}"
+        return self.base_index
+
+    def routing_for(self, course_id: Optional[str]) -> Optional[str]:
+        if course_id and self.strategy == "routing":
+            return course_slug(course_id)
+        return None
+
+    def search_params(self, courses: Optional[List[str]]) -> Dict:
+        """Parâmetros de `search` para os cursos dados; `None` busca em todos os cursos"""
+        if not courses:
+            index = self.base_index
+            if self.strategy == "index":
+                index = f"{self.base_index},{self.course_index_pattern()}"
+            return {"index": index}
+        if self.strategy == "index":
+            return {"index": ",".join(self.index_for(course) for course in courses)}
+        return {"index": self.base_index, "routing": ",".join(self.routing_for(course) for course in courses)}
+
+    def filter_for(self, courses: Optional[List[str]]) -> List[Dict]:
+        if not courses or self.strategy == "index":
+            return []
+        return [{"terms": {"metadata.course_id.keyword": [course_slug(course) for course in courses]}}]
@@ -0,0 +1,35 @@
+import hashlib
+import math
+from typing import List
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.core.lexical_index import tokenize
+
+
+class HashingEmbeddingEngine:
+    """Substituto local e determinístico do RAGEngine (feature hashing de termos e bigramas).
+
+    Não tem a qualidade semântica de um modelo real, mas serve o provedor `hashing` de
+    EMBEDDING_MODELS e torna avaliação e benchmarks reprodutíveis e livres de rede.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> List[str]:
+        tokens = tokenize(text)
+        return tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+
+    def generate_embeddings(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+        for feature in self._features(text):
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+            vector[digest % self.dimensions] += 1.0 if (digest >> 32) & 1 else -1.0
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm else vector
+
+    def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        return [self.generate_embeddings(text) for text in texts]
@@ -1,33 +1,201 @@
 import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
 from elasticsearch import Elasticsearch
+from elasticsearch.helpers import streaming_bulk
 from src.core.rag_engine import RAGEngine
+from src.core.lexical_index import LexicalIndex, get_lexical_index
+from src.core.chunker import chunk_text, batched
+from src.core.course_scope import CourseScope, course_slug
+from config.settings import EMBEDDING_BATCH_SIZE, BULK_CHUNK_SIZE
 import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+
+def index_mappings(dimensions: int) -> Dict:
+    return {
+        "properties": {
+            "content": {"type": "text"},
+            "embeddings": {"type": "dense_vector", "dims": dimensions, "similarity": "cosine"}
+        }
+    }
+
+
+def versioned_index_name(alias: str) -> str:
+    """Nome do índice físico por trás de `alias`; o prefixo evita que padrões como `<base>-course-*` o alcancem"""
+    return f"v{time.strftime('%Y%m%d%H%M%S')}-{alias}"
+
+
+def concrete_indices(es, name: str) -> List[str]:
+    """Índices físicos por trás de um alias (ou o próprio índice)"""
+    if es.indices.exists_alias(name=name):
+        return sorted(es.indices.get_alias(name=name).body)
+    if es.indices.exists(index=name):
+        return [name]
+    return []
+
+
+class IndexingError(Exception):
+    """Levantada quando um documento é indexado só em parte; `indexed` conta os chunks gravados"""
+
+    def __init__(self, message: str, indexed: int = 0):
+        super().__init__(message)
+        self.indexed = indexed
+
+
 class Indexer:
-    def __init__(self):
+    def __init__(self, index_name: str = None, rag_engine: RAGEngine = None, lexical_index: LexicalIndex = None, update_lexical_index: bool = True):
         self.es = Elasticsearch(
             os.getenv("ELASTICSEARCH_URL"),
             api_key=os.getenv("ELASTICSEARCH_API_KEY")
         )
-        self.index_name = os.getenv("ELASTICSEARCH_INDEX_NAME")
-        self.rag_engine = RAGEngine()
+        self.rag_engine = rag_engine if rag_engine is not None else RAGEngine()
+        self.index_name = index_name or getattr(self.rag_engine, "index_alias", None) or os.getenv("ELASTICSEARCH_INDEX_NAME")
+        self.lexical_index = lexical_index if lexical_index is not None else get_lexical_index()
+        self.update_lexical_index = update_lexical_index
+        self.course_scope = CourseScope(self.index_name)
+        self.known_indices = set()
+
+    def _mappings(self, index: str) -> Optional[Dict]:
+        if index != self.index_name and self.es.indices.exists(index=self.index_name):
+            return next(iter(self.es.indices.get_mapping(index=self.index_name).body.values()))["mappings"]
+        dimensions = getattr(self.rag_engine, "dimensions", None)
+        if dimensions:
+            return index_mappings(dimensions)
+        print(f"Dimensão dos embeddings desconhecida; {index} será criado com mapeamento dinâmico")
+        return None
+
+    def _ensure_index(self, index: str):
+        """Cria o índice, atrás de um alias com o nome dado, se ainda não existir.
 
-    def index_document(self, document) -> bool:
+        Índices de curso copiam o mapeamento do índice base; sem ele, o mapeamento vem da
+        dimensão do modelo de embedding.
+        """
+        if index in self.known_indices:
+            return
+        if not self.es.indices.exists(index=index):
+            self.es.indices.create(index=versioned_index_name(index), mappings=self._mappings(index), aliases={index: {}})
+        self.known_indices.add(index)
+
+    def _scoped(self, source_id: str, metadata: Dict, course_id: str = None):
+        if not course_id:
+            return source_id, metadata
+        slug = course_slug(course_id)
+        return f"{slug}/{source_id}", {**metadata, "course": course_id, "course_id": slug}
+
+    def index_document(self, document, course_id: str = None) -> bool:
         try:
             embeddings = self.rag_engine.generate_embeddings(document.content)
-            doc_to_index = document.model_dump()
-            doc_to_index["embeddings"] = embeddings
+            if not embeddings:
+                print(f"Embeddings vazios para {document.id}; documento não indexado")
+                return False
+            doc_id, metadata = self._scoped(document.id, document.metadata, course_id)
+            doc_to_index = {"id": doc_id, "content": document.content, "metadata": metadata, "embeddings": embeddings}
 
+            index = self.course_scope.index_for(course_id)
+            self._ensure_index(index)
             response = self.es.index(
-                index=self.index_name,
-                document=doc_to_index
+                index=index,
+                document=doc_to_index,
+                routing=self.course_scope.routing_for(course_id)
             )
-            return response["result"] == "created"
+            created = response["result"] == "created"
+            if created and self.update_lexical_index:
+                self.lexical_index.add(doc_id, document.content, metadata)
+                self.lexical_index.save()
+            return created
         except Exception as e:
             print(f"Erro ao indexar documento: {e}")
             return False
 
+    def iter_actions(self, source_id: str, pieces: Iterable[str], metadata: Dict, course_id: str = None) -> Iterator[Dict]:
+        """Gera as ações de bulk de um documento em chunks, embutindo os embeddings em lotes"""
+        source_id, metadata = self._scoped(source_id, metadata, course_id)
+        index = self.course_scope.index_for(course_id)
+        routing = self.course_scope.routing_for(course_id)
+        chunks = chunk_text(pieces)
+        for batch_number, batch in enumerate(batched(chunks, EMBEDDING_BATCH_SIZE)):
+            embeddings = self.rag_engine.generate_embeddings_batch(batch)
+            if len(embeddings) != len(batch):
+                raise RuntimeError(f"Embeddings indisponíveis para {source_id}; indexação interrompida")
+            for offset, (content, chunk_embeddings) in enumerate(zip(batch, embeddings)):
+                chunk_number = batch_number * EMBEDDING_BATCH_SIZE + offset
+                chunk_id = f"{source_id}#{chunk_number}"
+                chunk_metadata = {**metadata, "source_id": source_id, "chunk": chunk_number}
+                action = {
+                    "_index": index,
+                    "_id": chunk_id,
+                    "_source": {
+                        "id": chunk_id,
+                        "content": content,
+                        "metadata": chunk_metadata,
+                        "embeddings": chunk_embeddings
+                    }
+                }
+                if routing:
+                    action["_routing"] = routing
+                yield action
+
+    def _remove_stale_chunks(self, source_id: str, metadata: Dict, course_id: str, chunk_count: int):
+        """Remove chunks de uma versão anterior da fonte que a nova versão não sobrescreveu"""
+        scoped_id, scoped_metadata = self._scoped(source_id, metadata, course_id)
+        stale = [{"range": {"metadata.chunk": {"gte": chunk_count}}}]
+        if scoped_metadata.get("source_version"):
+            stale.append({"bool": {"must_not": {"term": {"metadata.source_version.keyword": scoped_metadata["source_version"]}}}})
+        self.es.delete_by_query(
+            index=self.course_scope.index_for(course_id),
+            query={"bool": {"filter": [{"term": {"metadata.source_id.keyword": scoped_id}}], "should": stale, "minimum_should_match": 1}},
+            conflicts="proceed",
+            refresh=True
+        )
+        if self.update_lexical_index:
+            self.lexical_index.remove_stale_chunks(scoped_id, scoped_metadata.get("source_version"), chunk_count)
+
+    def index_stream(self, source_id: str, pieces: Iterable[str], metadata: Dict, course_id: str = None) -> int:
+        """Indexa um documento a partir de trechos de texto incrementais; retorna os chunks gravados.
+
+        Levanta `IndexingError` se algum chunk não for gravado; chunks de versões anteriores
+        só são removidos depois que a nova versão foi gravada por inteiro. O índice léxico
+        recebe apenas os chunks que o Elasticsearch confirmou.
+        """
+        indexed, failed = 0, 0
+        pending = {}
+
+        def tracked(actions: Iterator[Dict]) -> Iterator[Dict]:
+            for action in actions:
+                pending[action["_id"]] = action["_source"]
+                yield action
+
+        try:
+            self._ensure_index(self.course_scope.index_for(course_id))
+            for ok, item in streaming_bulk(
+                self.es,
+                tracked(self.iter_actions(source_id, pieces, metadata, course_id)),
+                chunk_size=BULK_CHUNK_SIZE,
+                raise_on_error=False
+            ):
+                source = pending.pop(next(iter(item.values())).get("_id"), None)
+                if ok:
+                    indexed += 1
+                    if self.update_lexical_index and source is not None:
+                        self.lexical_index.add(source["id"], source["content"], source["metadata"])
+                else:
+                    failed += 1
+                    print(f"Erro ao indexar chunk: {item}")
+            if failed:
+                raise IndexingError(f"{failed} chunks de {source_id} não foram gravados", indexed)
+            if not indexed:
+                raise IndexingError(f"Nenhum texto extraído de {source_id}")
+            self._remove_stale_chunks(source_id, metadata, course_id, indexed)
+        except IndexingError:
+            raise
+        except Exception as e:
+            raise IndexingError(f"Erro ao indexar {source_id}: {e}", indexed) from e
+        finally:
+            if self.update_lexical_index:
+                self.lexical_index.save()
+        return indexed
+
 
@@ -0,0 +1,203 @@
+import json
+import math
+import re
+import tempfile
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from config.settings import LEXICAL_INDEX_PATH
+
+STOPWORDS = set("""
+a ao aos as ate com como da das de dela dele deles do dos e ela elas ele eles em entre era essa esse esta
+este eu foi for ha isso isto ja la lhe mais mas me mesmo meu minha muito na nas nem no nos nossa nosso
+num numa o os ou para pela pelas pelo pelos por qual quando que quem se sem ser seu seus so sua suas
+tambem te tem ter um uma umas uns voce voces sao esta estao foram sobre cada pode podem
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+PLURAL_RULES = [("ns", "m"), ("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"), ("les", "l"), ("res", "r"), ("zes", "z"), ("s", "")]
+FEMININE_RULES = [("ona", "ao"), ("ora", "or"), ("ina", "ino"), ("osa", "oso"), ("iva", "ivo"), ("ada", "ado"), ("ida", "ido"), ("eira", "eiro")]
+NOUN_SUFFIXES = [
+    "amentos", "imentos", "amento", "imento", "acoes", "icoes", "acao", "icao", "idades", "idade",
+    "ismos", "ismo", "istas", "ista", "aveis", "iveis", "avel", "ivel", "adores", "adora", "ador",
+    "edor", "idor", "ancia", "encia", "ante", "ente", "eza", "oso", "ico", "ica", "ivo", "iva",
+]
+VERB_SUFFIXES = [
+    "aram", "eram", "iram", "ariam", "eriam", "iriam", "ando", "endo", "indo", "asse", "esse", "isse",
+    "ava", "avam", "ara", "era", "ira", "ado", "ido", "ar", "er", "ir", "am", "em", "ou", "ei",
+]
+
+
+def strip_accents(text: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def _replace_suffix(word: str, rules: List[Tuple[str, str]], min_stem: int) -> Tuple[str, bool]:
+    for suffix, replacement in rules:
+        if word.endswith(suffix) and len(word) - len(suffix) >= min_stem:
+            return word[:-len(suffix)] + replacement, True
+    return word, False
+
+
+def stem(word: str) -> str:
+    """Stemmer leve para português inspirado nos passos do RSLP"""
+    if len(word) <= 3:
+        return word
+    word, _ = _replace_suffix(word, PLURAL_RULES, 2)
+    word, _ = _replace_suffix(word, FEMININE_RULES, 3)
+    if word.endswith("mente") and len(word) > 7:
+        word = word[:-5]
+    word, removed = _replace_suffix(word, [(suffix, "") for suffix in NOUN_SUFFIXES], 3)
+    if not removed:
+        word, removed = _replace_suffix(word, [(suffix, "") for suffix in VERB_SUFFIXES], 3)
+    if not removed and len(word) > 3 and word[-1] in "aeo":
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = TOKEN_PATTERN.findall(strip_accents(text.lower()))
+    return [stem(token) for token in tokens if token not in STOPWORDS]
+
+
+class LexicalIndex:
+    """Índice invertido em memória com ranqueamento BM25.
+
+    Recebe os mesmos documentos gravados pelo `Indexer` e responde consultas por
+    palavras-chave sem rede; também serve de pré-filtro e de fallback do `Retriever`.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.documents: Dict[str, Dict] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.total_length = 0
+        self.lock = threading.RLock()
+        self.save_lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, doc_id: str, content: str, metadata: Dict):
+        with self.lock:
+            self.remove(doc_id)
+            frequencies = Counter(tokenize(content))
+            self.documents[doc_id] = {"id": doc_id, "content": content, "metadata": metadata}
+            for term, count in frequencies.items():
+                self.postings.setdefault(term, {})[doc_id] = count
+            length = sum(frequencies.values())
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+
+    def remove(self, doc_id: str):
+        with self.lock:
+            if doc_id not in self.documents:
+                return
+            # os termos do documento são recalculados do texto, em vez de guardados por chunk
+            for term in set(tokenize(self.documents[doc_id]["content"])):
+                postings = self.postings[term]
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            del self.documents[doc_id]
+
+    def remove_stale_chunks(self, source_id: str, source_version: Optional[str], chunk_count: int) -> int:
+        """Remove chunks da fonte além de `chunk_count` ou de outra versão; retorna quantos saíram"""
+        with self.lock:
+            stale = [
+                doc_id for doc_id, doc in self.documents.items()
+                if doc["metadata"].get("source_id") == source_id and (
+                    doc["metadata"].get("chunk", 0) >= chunk_count
+                    or (source_version and doc["metadata"].get("source_version") != source_version)
+                )
+            ]
+            for doc_id in stale:
+                self.remove(doc_id)
+            return len(stale)
+
+    def search_ids(self, query: str, size: int = 5, content_type: str = None, course_ids: List[str] = None) -> List[Tuple[str, float]]:
+        with self.lock:
+            if not self.documents:
+                return []
+            n_docs = len(self.documents)
+            avg_length = self.total_length / n_docs or 1.0
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            if content_type:
+                scores = {
+                    doc_id: score for doc_id, score in scores.items()
+                    if self.documents[doc_id]["metadata"].get("type") == content_type
+                }
+            if course_ids:
+                scores = {
+                    doc_id: score for doc_id, score in scores.items()
+                    if self.documents[doc_id]["metadata"].get("course_id") in course_ids
+                }
+            return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:size]
+
+    def search(self, query: str, size: int = 5, content_type: str = None, course_ids: List[str] = None) -> List[Dict]:
+        return [self.documents[doc_id] for doc_id, _ in self.search_ids(query, size, content_type, course_ids)]
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        if not path:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # gravações simultâneas (indexação e reconstrução) não podem intercalar cópia e troca do arquivo
+        with self.save_lock:
+            with self.lock:
+                payload = list(self.documents.values())
+            fd, tmp_path = tempfile.mkstemp(dir=directory or None, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+    def load(self, path: str):
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Erro ao carregar índice léxico: {e}")
+            return
+        for doc in payload:
+            self.add(doc["id"], doc["content"], doc.get("metadata", {}))
+
+
+_default_index: Optional[LexicalIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> LexicalIndex:
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = LexicalIndex(LEXICAL_INDEX_PATH)
+        return _default_index
@@ -0,0 +1,183 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from config.settings import (
+    CONVERSATION_CANDIDATE_POOL,
+    PREFETCH_DEBOUNCE_SECONDS,
+    PREFETCH_MIN_CHARS,
+    PREFETCH_MATCH_THRESHOLD,
+    PREFETCH_MAX_AGE,
+    PREFETCH_WAIT_TIMEOUT
+)
+from src.utils.vectors import cosine_similarity
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class Prefetch:
+    def __init__(self, query: str, scope: Tuple):
+        self.query = query
+        self.normalized = normalize_query(query)
+        self.scope = scope
+        self.created_at = time.monotonic()
+        self.future = None
+        self.cancelled = False
+
+
+class RetrievalPrefetcher:
+    """Antecipa embeddings e busca enquanto o usuário digita.
+
+    Cada chamada de `prefetch` reinicia o debounce; só o texto mais recente é buscado.
+    `take` entrega o resultado quando a consulta final é igual ou próxima o bastante do
+    texto antecipado e cancela o que não for aproveitado.
+    """
+
+    def __init__(
+        self,
+        retriever,
+        debounce: float = PREFETCH_DEBOUNCE_SECONDS,
+        min_chars: int = PREFETCH_MIN_CHARS,
+        match_threshold: float = PREFETCH_MATCH_THRESHOLD,
+        max_age: float = PREFETCH_MAX_AGE,
+        wait_timeout: float = PREFETCH_WAIT_TIMEOUT,
+        size: int = CONVERSATION_CANDIDATE_POOL
+    ):
+        self.retriever = retriever
+        self.debounce = debounce
+        self.min_chars = min_chars
+        self.match_threshold = match_threshold
+        self.max_age = max_age
+        self.wait_timeout = wait_timeout
+        self.size = size
+
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="retrieval-prefetch")
+        self.lock = threading.Lock()
+        self.timer: Optional[threading.Timer] = None
+        self.pending: Optional[Prefetch] = None
+        self.stats = {"scheduled": 0, "started": 0, "hits": 0, "misses": 0, "cancelled": 0}
+
+    @staticmethod
+    def _scope(content_type: str, courses: List[str], mode: str) -> Tuple:
+        return content_type, tuple(courses or ()), mode
+
+    def prefetch(self, partial: str, content_type: str = None, courses: List[str] = None, mode: str = None):
+        """Agenda a busca antecipada de `partial` após o intervalo de debounce"""
+        scope = self._scope(content_type, courses, mode)
+        normalized = normalize_query(partial)
+        with self.lock:
+            if self.pending is not None and self.pending.normalized == normalized and self.pending.scope == scope:
+                return
+            self._cancel_locked()
+            if len(normalized) < self.min_chars:
+                return
+            prefetch = Prefetch(partial, scope)
+            self.pending = prefetch
+            self.timer = threading.Timer(self.debounce, self._start, args=(prefetch,))
+            self.timer.daemon = True
+            self.timer.start()
+            self.stats["scheduled"] += 1
+
+    def _start(self, prefetch: Prefetch):
+        with self.lock:
+            if self.pending is not prefetch or prefetch.cancelled:
+                return
+            prefetch.future = self.executor.submit(self._run, prefetch)
+            self.stats["started"] += 1
+
+    def _lexical(self, mode: str) -> bool:
+        return (mode or self.retriever.mode) == "lexical"
+
+    def _run(self, prefetch: Prefetch) -> Tuple[List[float], List[Dict]]:
+        content_type, courses, mode = prefetch.scope
+        query_embeddings = None
+        if not self._lexical(mode):
+            query_embeddings = self.retriever.embed_query(prefetch.query)
+            if prefetch.cancelled or not query_embeddings:
+                return query_embeddings, None
+        documents = self.retriever.retrieve_documents(
+            prefetch.query,
+            content_type,
+            query_embeddings=query_embeddings,
+            size=self.size,
+            mode=mode,
+            courses=list(courses) or None
+        )
+        return query_embeddings, documents
+
+    def _cancel_locked(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.pending is not None:
+            self.pending.cancelled = True
+            if self.pending.future is not None:
+                self.pending.future.cancel()
+            self.pending = None
+            self.stats["cancelled"] += 1
+
+    def cancel(self):
+        """Descarta a busca antecipada pendente, se houver"""
+        with self.lock:
+            self._cancel_locked()
+
+    def take(self, query: str, content_type: str = None, courses: List[str] = None, mode: str = None) -> Tuple[Optional[List[float]], Optional[List[Dict]]]:
+        """Retorna (embeddings da consulta, documentos) aproveitáveis para `query`.
+
+        Os documentos vêm como None quando não há busca antecipada compatível; os
+        embeddings da consulta final são devolvidos sempre que já tiverem sido calculados.
+        Uma busca antecipada de texto diferente só é esperada se já tiver terminado, e no
+        modo léxico só texto idêntico é aproveitado, sem chamar a API de embeddings.
+        """
+        with self.lock:
+            prefetch = self.pending
+            if prefetch is not None and prefetch.future is not None:
+                self.pending = None
+            else:
+                self._cancel_locked()
+                prefetch = None
+
+        if (
+            prefetch is None
+            or prefetch.scope != self._scope(content_type, courses, mode)
+            or time.monotonic() - prefetch.created_at > self.max_age
+        ):
+            if prefetch is not None:
+                prefetch.cancelled = True
+                prefetch.future.cancel()
+                self.stats["cancelled"] += 1
+            self.stats["misses"] += 1
+            return None, None
+
+        query_embeddings = None
+        if prefetch.normalized != normalize_query(query):
+            if self._lexical(mode) or not prefetch.future.done():
+                prefetch.cancelled = True
+                prefetch.future.cancel()
+                self.stats["cancelled"] += 1
+                self.stats["misses"] += 1
+                return None, None
+            query_embeddings = self.retriever.embed_query(query)
+
+        try:
+            prefetched_embeddings, documents = prefetch.future.result(timeout=self.wait_timeout)
+        except Exception as e:
+            print(f"Busca antecipada descartada: {e}")
+            prefetch.future.cancel()
+            self.stats["misses"] += 1
+            return query_embeddings, None
+
+        if query_embeddings is None:
+            query_embeddings = prefetched_embeddings
+        elif not prefetched_embeddings or cosine_similarity(query_embeddings, prefetched_embeddings) < self.match_threshold:
+            documents = None
+
+        self.stats["hits" if documents is not None else "misses"] += 1
+        return query_embeddings or None, documents
@@ -5,21 +5,77 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from config.settings import EMBEDDING_MODELS, EMBEDDING_MODEL
+from src.core.hashing_embedder import HashingEmbeddingEngine
+from src.utils.api_client import get_api_client
+
+
+def get_embedding_model(name: str = None) -> dict:
+    """Entrada do registro de modelos de embedding (padrão: o modelo ativo)"""
+    name = name or EMBEDDING_MODEL
+    if name not in EMBEDDING_MODELS:
+        raise ValueError(f"Modelo de embedding desconhecido: {name}")
+    return {"name": name, **EMBEDDING_MODELS[name]}
+
+
 class RAGEngine:
-    def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, model: str = None):
+        spec = get_embedding_model(model)
+        self.model = spec["name"]
+        self.provider = spec["provider"]
+        self.dimensions = spec["dimensions"]
+        self.index_alias = spec["index_alias"]
+        self.request_params = {"dimensions": self.dimensions} if spec.get("request_dimensions") else {}
+
+        self.api_client = get_api_client()
+        self.openai_client = None
+        self.local_engine = None
+        if self.provider == "openai":
+            self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        elif self.provider == "hashing":
+            self.local_engine = HashingEmbeddingEngine(self.dimensions)
+        else:
+            raise ValueError(f"Provedor de embedding desconhecido: {self.provider}")
+
+    def _check_dimensions(self, embeddings: list[list[float]]) -> list[list[float]]:
+        for vector in embeddings:
+            if len(vector) != self.dimensions:
+                raise ValueError(f"{self.model} retornou vetor de dimensão {len(vector)}; esperado {self.dimensions}")
+        return embeddings
 
     def generate_embeddings(self, text: str) -> list[float]:
         try:
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-ada-002",
-                input=text
+            if self.local_engine is not None:
+                return self.local_engine.generate_embeddings(text)
+            response = self.api_client.call(
+                self.model,
+                self.openai_client.embeddings.create,
+                model=self.model,
+                input=text,
+                coalesce_key=text,
+                **self.request_params
             )
-            return response.data[0].embedding
+            return self._check_dimensions([response.data[0].embedding])[0]
         except Exception as e:
             print(f"Erro ao gerar embeddings: {e}")
             return []
 
+    def generate_embeddings_batch(self, texts: list[str]) -> list[list[float]]:
+        try:
+            if self.local_engine is not None:
+                return self.local_engine.generate_embeddings_batch(texts)
+            response = self.api_client.call(
+                self.model,
+                self.openai_client.embeddings.create,
+                model=self.model,
+                input=texts,
+                **self.request_params
+            )
+            return self._check_dimensions([item.embedding for item in sorted(response.data, key=lambda item: item.index)])
+        except Exception as e:
+            print(f"Erro ao gerar embeddings em lote: {e}")
+            return []
+
     def process_query(self, query: str):
 
         pass
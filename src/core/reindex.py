@@ -0,0 +1,205 @@
+import argparse
+from typing import Dict, Iterator, List, Tuple
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import scan, streaming_bulk
+
+from config.settings import REINDEX_BATCH_SIZE, BULK_CHUNK_SIZE
+from src.core.chunker import batched
+from src.core.course_scope import CourseScope
+from src.core.indexer import index_mappings, versioned_index_name, concrete_indices
+from src.core.rag_engine import RAGEngine, get_embedding_model
+
+
+class ReindexError(Exception):
+    """Levantada quando o novo índice não pode substituir o atual"""
+
+
+class EmbeddingReindexer:
+    """Reindexa o corpus com outro modelo de embedding sem tirar a busca do ar.
+
+    Cada índice lógico do modelo de origem (base e cursos) é relido em lotes, recebe
+    novos embeddings e é gravado num índice físico novo. Só depois de tudo copiado os
+    aliases do modelo de destino são trocados numa única chamada `_aliases`, então a
+    busca vê o corpus inteiro na dimensão antiga ou inteiro na nova.
+
+    Gravações feitas na origem durante a cópia são recuperadas comparando `_seq_no` e
+    `_primary_term` de cada documento com os da cópia: documentos novos ou atualizados
+    no lugar (os ids dos chunks são determinísticos) são copiados de novo e os removidos
+    são apagados do destino. A última recuperação roda com a origem bloqueada para
+    escrita até a troca dos aliases; nesse intervalo a indexação falha com erro em vez
+    de se perder. Quando origem e destino são modelos diferentes, o que for gravado no
+    modelo de origem depois da troca não chega ao destino: troque `EMBEDDING_MODEL`
+    logo em seguida.
+    """
+
+    def __init__(
+        self,
+        target_model: str,
+        source_model: str = None,
+        batch_size: int = REINDEX_BATCH_SIZE,
+        rag_engine: RAGEngine = None,
+        es: Elasticsearch = None
+    ):
+        self.source = get_embedding_model(source_model)
+        self.target = get_embedding_model(target_model)
+        self.batch_size = batch_size
+        self.rag_engine = rag_engine if rag_engine is not None else RAGEngine(target_model)
+        self.es = es if es is not None else Elasticsearch(
+            os.getenv("ELASTICSEARCH_URL"),
+            api_key=os.getenv("ELASTICSEARCH_API_KEY")
+        )
+        self.copied: Dict[str, Dict[str, Tuple[int, int]]] = {}
+
+    def logical_indices(self) -> List[str]:
+        """Índice base e índices de curso servidos pelo modelo de origem"""
+        alias = self.source["index_alias"]
+        names = [alias] if self.es.indices.exists(index=alias) else []
+        pattern = CourseScope(alias, "index").course_index_pattern()
+        resolved = self.es.indices.resolve_index(name=pattern).body
+        names += sorted(
+            {item["name"] for item in resolved.get("aliases", [])}
+            | {item["name"] for item in resolved.get("indices", [])}
+        )
+        return names
+
+    def target_name(self, source_name: str) -> str:
+        return self.target["index_alias"] + source_name[len(self.source["index_alias"]):]
+
+    def _actions(self, source_name: str, index: str, ids: List[str] = None) -> Iterator[Dict]:
+        query = {"query": {"ids": {"values": ids}}} if ids is not None else {"query": {"match_all": {}}}
+        hits = scan(self.es, index=source_name, query=query, source_excludes=["embeddings"], seq_no_primary_term=True)
+        copied = self.copied.setdefault(source_name, {})
+        for batch in batched(hits, self.batch_size):
+            embeddings = self.rag_engine.generate_embeddings_batch([hit["_source"]["content"] for hit in batch])
+            if len(embeddings) != len(batch):
+                raise ReindexError(f"Embeddings indisponíveis ao reindexar {source_name}")
+            for hit, vector in zip(batch, embeddings):
+                copied[hit["_id"]] = (hit["_seq_no"], hit["_primary_term"])
+                action = {"_index": index, "_id": hit["_id"], "_source": {**hit["_source"], "embeddings": vector}}
+                if hit.get("_routing"):
+                    action["_routing"] = hit["_routing"]
+                yield action
+
+    def _copy(self, source_name: str, index: str, ids: List[str] = None) -> int:
+        copied = 0
+        for ok, item in streaming_bulk(self.es, self._actions(source_name, index, ids), chunk_size=BULK_CHUNK_SIZE, raise_on_error=False):
+            if not ok:
+                raise ReindexError(f"Erro ao gravar em {index}: {item}")
+            copied += 1
+        return copied
+
+    def _versions(self, index: str) -> Dict[str, Tuple[int, int]]:
+        hits = scan(self.es, index=index, query={"query": {"match_all": {}}}, source=False, seq_no_primary_term=True)
+        return {hit["_id"]: (hit["_seq_no"], hit["_primary_term"]) for hit in hits}
+
+    def _catch_up(self, source_name: str, index: str) -> int:
+        """Replica no destino o que mudou na origem desde a cópia"""
+        self.es.indices.refresh(index=source_name)
+        current = self._versions(source_name)
+        copied = self.copied.setdefault(source_name, {})
+        changed = sorted(doc_id for doc_id, version in current.items() if copied.get(doc_id) != version)
+        removed = sorted(set(copied) - set(current))
+
+        for batch in batched(iter(changed), self.batch_size):
+            self._copy(source_name, index, batch)
+        for batch in batched(iter(removed), self.batch_size):
+            self.es.delete_by_query(index=index, query={"ids": {"values": batch}}, conflicts="proceed")
+            for doc_id in batch:
+                copied.pop(doc_id, None)
+        self.es.indices.refresh(index=index)
+        return len(changed) + len(removed)
+
+    def _set_write_block(self, indices: List[str], blocked: bool):
+        if indices:
+            self.es.indices.put_settings(index=",".join(indices), settings={"index.blocks.write": blocked})
+
+    def _swap_actions(self, alias: str, index: str) -> List[Dict]:
+        if self.es.indices.exists_alias(name=alias):
+            previous = concrete_indices(self.es, alias)
+            return [{"remove": {"index": name, "alias": alias}} for name in previous] + [{"add": {"index": index, "alias": alias}}]
+        if self.es.indices.exists(index=alias):
+            return [{"remove_index": {"index": alias}}, {"add": {"index": index, "alias": alias}}]
+        return [{"add": {"index": index, "alias": alias}}]
+
+    def run(self, dry_run: bool = False, keep_old: bool = False, drop_legacy: bool = False) -> Dict:
+        sources = self.logical_indices()
+        stats = {
+            "source_model": self.source["name"],
+            "target_model": self.target["name"],
+            "dimensions": self.target["dimensions"],
+            "indices": len(sources),
+            "documents": sum(self.es.count(index=name)["count"] for name in sources),
+            "copied": 0,
+            "caught_up": 0,
+            "dropped": 0,
+        }
+        if dry_run or not sources:
+            return stats
+
+        for source_name in sources:
+            alias = self.target_name(source_name)
+            if not drop_legacy and not self.es.indices.exists_alias(name=alias) and self.es.indices.exists(index=alias):
+                raise ReindexError(f"{alias} é um índice físico; use --drop-legacy para substituí-lo por um alias")
+
+        built = {}
+        blocked = []
+        try:
+            for source_name in sources:
+                alias = self.target_name(source_name)
+                index = versioned_index_name(alias)
+                self.es.indices.create(index=index, mappings=index_mappings(self.target["dimensions"]))
+                built[alias] = index
+                stats["copied"] += self._copy(source_name, index)
+            for source_name in sources:
+                stats["caught_up"] += self._catch_up(source_name, built[self.target_name(source_name)])
+
+            # última recuperação com a origem parada, até a troca dos aliases
+            blocked = sorted({index for source_name in sources for index in concrete_indices(self.es, source_name)})
+            self._set_write_block(blocked, True)
+            for source_name in sources:
+                stats["caught_up"] += self._catch_up(source_name, built[self.target_name(source_name)])
+
+            previous = {alias: concrete_indices(self.es, alias) for alias in built if self.es.indices.exists_alias(name=alias)}
+            actions = []
+            for alias, index in built.items():
+                actions += self._swap_actions(alias, index)
+            self.es.indices.update_aliases(actions=actions)
+        except Exception:
+            self._set_write_block(blocked, False)
+            for index in built.values():
+                self.es.indices.delete(index=index, ignore_unavailable=True)
+            raise
+        self._set_write_block([index for index in blocked if self.es.indices.exists(index=index)], False)
+
+        if not keep_old:
+            for indices in previous.values():
+                for index in indices:
+                    if index not in built.values():
+                        self.es.indices.delete(index=index, ignore_unavailable=True)
+                        stats["dropped"] += 1
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reindexa o corpus com outro modelo de embedding e troca o alias")
+    parser.add_argument("--model", required=True, help="modelo de destino (chave de EMBEDDING_MODELS)")
+    parser.add_argument("--source-model", default=None, help="modelo cujo índice é relido (padrão: o modelo ativo)")
+    parser.add_argument("--batch-size", type=int, default=REINDEX_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="apenas mostra índices e documentos a reindexar")
+    parser.add_argument("--keep-old", action="store_true", help="mantém os índices físicos substituídos")
+    parser.add_argument("--drop-legacy", action="store_true", help="substitui por alias um índice físico com o nome do alias")
+    args = parser.parse_args()
+
+    reindexer = EmbeddingReindexer(args.model, args.source_model, args.batch_size)
+    stats = reindexer.run(dry_run=args.dry_run, keep_old=args.keep_old, drop_legacy=args.drop_legacy)
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
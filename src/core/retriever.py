@@ -1,19 +1,71 @@
+import argparse
 import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from elasticsearch import Elasticsearch
+from elasticsearch.helpers import scan
 from src.core.rag_engine import RAGEngine
-from typing import List, Dict, Any
+from src.core.lexical_index import LexicalIndex, get_lexical_index
+from src.core.course_scope import CourseScope, course_slug
+from config.settings import RETRIEVER_EMBEDDING_TIMEOUT, RETRIEVER_ES_TIMEOUT, RETRIEVER_PREFILTER_SIZE
+from typing import List, Dict, Any, Iterator
+
+RETRIEVAL_MODES = ("hybrid", "prefilter", "lexical")
 
 class Retriever:
-    def __init__(self):
+    def __init__(self, mode: str = "hybrid", lexical_index: LexicalIndex = None, lexical_fallback: bool = True, index_name: str = None, rag_engine: RAGEngine = None):
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Modo de busca inválido: {mode}")
         self.es = Elasticsearch(
             os.getenv("ELASTICSEARCH_URL"),
             api_key=os.getenv("ELASTICSEARCH_API_KEY")
         )
-        self.index_name = os.getenv("ELASTICSEARCH_INDEX_NAME")
-        self.rag_engine = RAGEngine()
+        self.rag_engine = rag_engine if rag_engine is not None else RAGEngine()
+        self.index_name = index_name or getattr(self.rag_engine, "index_alias", None) or os.getenv("ELASTICSEARCH_INDEX_NAME")
+        self.mode = mode
+        self.lexical_index = lexical_index if lexical_index is not None else get_lexical_index()
+        self.lexical_fallback = lexical_fallback
+        self.course_scope = CourseScope(self.index_name)
+        self.embedding_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="query-embedding")
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embeddings da consulta, ou lista vazia se não chegarem em `RETRIEVER_EMBEDDING_TIMEOUT`"""
+        future = self.embedding_executor.submit(self.rag_engine.generate_embeddings, query)
+        try:
+            return future.result(timeout=RETRIEVER_EMBEDDING_TIMEOUT)
+        except FutureTimeoutError:
+            print("Tempo esgotado ao gerar embeddings da consulta")
+            return []
+
+    def _lexical_fallback(self, query: str, content_type: str = None, size: int = 5, course_ids: List[str] = None) -> List[Dict]:
+        if not self.lexical_fallback:
+            return []
+        print("Usando o índice léxico local como fallback")
+        return self.lexical_index.search(query, size, content_type, course_ids)
+
+    def fallback_search(self, query: str, content_type: str = None, size: int = 5, courses: List[str] = None) -> List[Dict]:
+        """Busca no índice léxico local, para quando não há embeddings da consulta"""
+        course_ids = [course_slug(course) for course in courses] if courses else None
+        return self._lexical_fallback(query, content_type, size, course_ids)
 
-    def retrieve_documents(self, query: str, content_type: str = None) -> List[Dict]:
-        query_embeddings = self.rag_engine.generate_embeddings(query)
+    def retrieve_documents(self, query: str, content_type: str = None, query_embeddings: List[float] = None, size: int = 5, mode: str = None, courses: List[str] = None) -> List[Dict]:
+        """Busca nos cursos informados; sem `courses`, a busca é feita em todos os cursos"""
+        mode = mode or self.mode
+        if content_type == "Todos":
+            content_type = None
+        course_ids = [course_slug(course) for course in courses] if courses else None
+
+        if mode == "lexical":
+            return self.lexical_index.search(query, size, content_type, course_ids)
+
+        candidate_ids = []
+        if mode == "prefilter":
+            candidate_ids = [doc_id for doc_id, _ in self.lexical_index.search_ids(query, RETRIEVER_PREFILTER_SIZE, content_type, course_ids)]
+
+        if query_embeddings is None:
+            query_embeddings = self.embed_query(query)
+        if not query_embeddings:
+            print("Embeddings da consulta indisponíveis")
+            return self._lexical_fallback(query, content_type, size, course_ids)
 
         search_body = {
             "query": {
@@ -42,24 +94,75 @@ class Retriever:
                     "minimum_should_match": 0 
                 }
             },
-            "size": 5, 
+            "size": size, 
             "min_score": 1.0 
         }
 
-        if content_type and content_type != "Todos":
-
-            search_body["query"]["bool"]["filter"] = [
-                {"term": {"metadata.type.keyword": content_type}}
-            ]
+        filters = self.course_scope.filter_for(courses)
+        if content_type:
+            filters.append({"term": {"metadata.type.keyword": content_type}})
+        if candidate_ids:
+            filters.append({"terms": {"id.keyword": candidate_ids}})
+        if filters:
+            search_body["query"]["bool"]["filter"] = filters
 
         try:
-            response = self.es.search(
-                index=self.index_name,
-                body=search_body
+            response = self.es.options(request_timeout=RETRIEVER_ES_TIMEOUT).search(
+                body=search_body,
+                ignore_unavailable=True,
+                **self.course_scope.search_params(courses)
             )
             return [hit["_source"] for hit in response["hits"]["hits"]]
         except Exception as e:
             print(f"Erro na busca: {e}")
+            return self._lexical_fallback(query, content_type, size, course_ids)
+
+    def scan_documents(self, content_type: str = None, courses: List[str] = None) -> Iterator[Dict]:
+        filters = self.course_scope.filter_for(courses)
+        if content_type:
+            filters.append({"term": {"metadata.type.keyword": content_type}})
+        query = {"bool": {"filter": filters}} if filters else {"match_all": {}}
+        params = self.course_scope.search_params(courses)
+        try:
+            for hit in scan(self.es, query={"query": query}, ignore_unavailable=True, **params):
+                yield hit["_source"]
+        except Exception as e:
+            print(f"Erro ao percorrer o índice: {e}")
+
+    def list_courses(self) -> List[str]:
+        """Cursos com conteúdo indexado (nomes como informados na indexação)"""
+        try:
+            response = self.es.search(
+                size=0,
+                aggs={"courses": {"terms": {"field": "metadata.course.keyword", "size": 1000}}},
+                ignore_unavailable=True,
+                **self.course_scope.search_params(None)
+            )
+            return sorted(bucket["key"] for bucket in response["aggregations"]["courses"]["buckets"])
+        except Exception as e:
+            print(f"Erro ao listar cursos: {e}")
             return []
 
+    def rebuild_lexical_index(self) -> int:
+        """Reconstrói o índice léxico local a partir dos documentos já indexados no Elasticsearch"""
+        for doc in self.scan_documents():
+            self.lexical_index.add(doc["id"], doc["content"], doc.get("metadata", {}))
+        self.lexical_index.save()
+        return len(self.lexical_index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manutenção do índice léxico local usado pelo Retriever")
+    parser.add_argument("--rebuild-lexical", action="store_true", help="repovoa o índice léxico a partir do Elasticsearch")
+    args = parser.parse_args()
+
+    if not args.rebuild_lexical:
+        parser.print_help()
+        return
+    print(f"Documentos no índice léxico: {Retriever().rebuild_lexical_index()}")
+
+
+if __name__ == "__main__":
+    main()
+
 
@@ -0,0 +1,248 @@
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from config.settings import (
+    PROFILE_DB_PATH,
+    PROFILE_WRITE_BATCH_SIZE,
+    PROFILE_WRITE_FLUSH_INTERVAL
+)
+
+DEFAULT_PROFILE = {
+    "knowledge_level": "iniciante",
+    "learning_preference": "texto",
+}
+
+DIFFICULTY_MARKERS = (
+    "não entendi",
+    "nao entendi",
+    "não compreendi",
+    "difícil",
+    "dificil",
+    "confuso",
+    "confusa",
+    "dúvida",
+    "duvida",
+    "não sei",
+    "nao sei",
+    "explica de novo",
+    "explique novamente",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS learners (
+    learner_id TEXT PRIMARY KEY,
+    knowledge_level TEXT NOT NULL,
+    learning_preference TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS difficulties (
+    learner_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    occurrences INTEGER NOT NULL DEFAULT 1,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (learner_id, topic)
+);
+CREATE INDEX IF NOT EXISTS idx_difficulties_learner_last_seen ON difficulties (learner_id, last_seen DESC);
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    learner_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    topic TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_interactions_learner_created ON interactions (learner_id, created_at);
+"""
+
+UPSERT_LEARNER = """
+INSERT INTO learners (learner_id, knowledge_level, learning_preference, updated_at)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (learner_id) DO UPDATE SET
+    knowledge_level = excluded.knowledge_level,
+    learning_preference = excluded.learning_preference,
+    updated_at = excluded.updated_at
+"""
+
+UPSERT_DIFFICULTY = """
+INSERT INTO difficulties (learner_id, topic, occurrences, last_seen)
+VALUES (?, ?, 1, ?)
+ON CONFLICT (learner_id, topic) DO UPDATE SET
+    occurrences = occurrences + 1,
+    last_seen = excluded.last_seen
+"""
+
+INSERT_INTERACTION = """
+INSERT INTO interactions (learner_id, role, content, topic, created_at)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+
+def signals_difficulty(message: str) -> bool:
+    text = message.lower()
+    return any(marker in text for marker in DIFFICULTY_MARKERS)
+
+
+class ProfileStore:
+    """Perfis de aluno persistidos em SQLite.
+
+    Leituras são servidas por um cache em memória (um acesso a dicionário por turno);
+    escritas entram numa fila e são gravadas em lote por uma thread em segundo plano.
+    """
+
+    def __init__(
+        self,
+        db_path: str = PROFILE_DB_PATH,
+        batch_size: int = PROFILE_WRITE_BATCH_SIZE,
+        flush_interval: float = PROFILE_WRITE_FLUSH_INTERVAL,
+        max_difficulties: int = 5
+    ):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_difficulties = max_difficulties
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.read_conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.read_conn.execute("PRAGMA journal_mode=WAL")
+        self.read_conn.executescript(SCHEMA)
+        self.read_lock = threading.Lock()
+
+        self.cache: Dict[str, Dict] = {}
+        self.cache_lock = threading.Lock()
+
+        self.writes: "queue.Queue" = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, name="profile-store-writer", daemon=True)
+        self.writer.start()
+
+    def _load(self, learner_id: str) -> Dict:
+        with self.read_lock:
+            row = self.read_conn.execute(
+                "SELECT knowledge_level, learning_preference FROM learners WHERE learner_id = ?",
+                (learner_id,)
+            ).fetchone()
+            difficulty_rows = self.read_conn.execute(
+                "SELECT topic, occurrences FROM difficulties WHERE learner_id = ? ORDER BY last_seen DESC",
+                (learner_id,)
+            ).fetchall()
+            interactions = self.read_conn.execute(
+                "SELECT COUNT(*) FROM interactions WHERE learner_id = ?",
+                (learner_id,)
+            ).fetchone()[0]
+
+        profile = dict(DEFAULT_PROFILE)
+        if row:
+            profile["knowledge_level"], profile["learning_preference"] = row
+        profile["difficulty_counts"] = {topic: occurrences for topic, occurrences in difficulty_rows}
+        profile["interactions"] = interactions
+        return profile
+
+    def _cached(self, learner_id: str) -> Dict:
+        with self.cache_lock:
+            profile = self.cache.get(learner_id)
+        if profile is None:
+            profile = self._load(learner_id)
+            with self.cache_lock:
+                profile = self.cache.setdefault(learner_id, profile)
+        return profile
+
+    def get_profile(self, learner_id: str) -> Dict:
+        profile = self._cached(learner_id)
+        with self.cache_lock:
+            difficulties = list(profile["difficulty_counts"])[:self.max_difficulties]
+            return {
+                "knowledge_level": profile["knowledge_level"],
+                "learning_preference": profile["learning_preference"],
+                "difficulties": difficulties,
+                "interactions": profile["interactions"],
+            }
+
+    def save_profile(self, learner_id: str, knowledge_level: str, learning_preference: str):
+        profile = self._cached(learner_id)
+        with self.cache_lock:
+            if (profile["knowledge_level"], profile["learning_preference"]) == (knowledge_level, learning_preference):
+                return
+            profile["knowledge_level"] = knowledge_level
+            profile["learning_preference"] = learning_preference
+        self.writes.put((UPSERT_LEARNER, (learner_id, knowledge_level, learning_preference, time.time())))
+
+    def record_difficulty(self, learner_id: str, topic: str):
+        profile = self._cached(learner_id)
+        with self.cache_lock:
+            counts = profile["difficulty_counts"]
+            occurrences = counts.pop(topic, 0) + 1
+            profile["difficulty_counts"] = {topic: occurrences, **counts}
+        self.writes.put((UPSERT_DIFFICULTY, (learner_id, topic, time.time())))
+
+    def record_interaction(self, learner_id: str, role: str, content: str, topic: Optional[str] = None):
+        profile = self._cached(learner_id)
+        with self.cache_lock:
+            profile["interactions"] += 1
+        self.writes.put((INSERT_INTERACTION, (learner_id, role, content, topic, time.time())))
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List):
+        try:
+            with conn:
+                for statement, params in batch:
+                    conn.execute(statement, params)
+        except sqlite3.Error as e:
+            print(f"Erro ao persistir perfis: {e}")
+
+    def _write_loop(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        while True:
+            item = self.writes.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.writes.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._write_batch(conn, batch)
+                    for _ in range(len(batch) + 1):
+                        self.writes.task_done()
+                    conn.close()
+                    return
+                batch.append(item)
+            self._write_batch(conn, batch)
+            for _ in batch:
+                self.writes.task_done()
+        self.writes.task_done()
+        conn.close()
+
+    def flush(self):
+        """Bloqueia até que todas as escritas enfileiradas tenham sido gravadas"""
+        self.writes.join()
+
+    def close(self):
+        self.writes.put(None)
+        self.writer.join()
+        with self.read_lock:
+            self.read_conn.close()
+
+
+_default_store: Optional[ProfileStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_profile_store() -> ProfileStore:
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ProfileStore()
+        return _default_store
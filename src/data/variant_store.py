@@ -0,0 +1,183 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from config.settings import VARIANT_DB_PATH, VARIANT_MATCH_THRESHOLD
+from src.utils.vectors import cosine_similarity
+
+KNOWLEDGE_LEVELS = ["iniciante", "intermediário", "avançado"]
+LEARNING_PREFERENCES = ["texto", "vídeo", "imagem", "exercício"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    topic_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    source_version TEXT NOT NULL,
+    embeddings TEXT NOT NULL,
+    chunks TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS variants (
+    topic_id TEXT NOT NULL,
+    source_version TEXT NOT NULL,
+    knowledge_level TEXT NOT NULL,
+    learning_preference TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (topic_id, source_version, knowledge_level, learning_preference)
+);
+"""
+
+
+def content_version(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+def document_source(doc: Dict) -> Tuple[str, str]:
+    """(topic_id, versão da fonte) de um documento indexado, inteiro ou em chunks"""
+    metadata = doc.get("metadata", {})
+    return metadata.get("source_id", doc["id"]), metadata.get("source_version") or content_version(doc["content"])
+
+
+def chunk_key(doc: Dict) -> str:
+    return doc["id"]
+
+
+def profile_buckets() -> List[Tuple[str, str]]:
+    return [(level, preference) for level in KNOWLEDGE_LEVELS for preference in LEARNING_PREFERENCES]
+
+
+class VariantStore:
+    """Explicações pré-geradas por tópico e perfil, chaveadas pela versão da fonte.
+
+    Um tópico é uma seção de uma fonte (uma sequência de chunks); a variante só é servida
+    quando a seção cobre os chunks recuperados para a pergunta. Todo o conteúdo é mantido
+    em memória para que a consulta no caminho do chat não toque o disco; o SQLite serve
+    apenas de persistência entre execuções.
+    """
+
+    def __init__(self, db_path: str = VARIANT_DB_PATH, match_threshold: float = VARIANT_MATCH_THRESHOLD):
+        self.db_path = db_path
+        self.match_threshold = match_threshold
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(topics)")}
+        if "chunks" not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE topics ADD COLUMN chunks TEXT NOT NULL DEFAULT '[]'")
+        self.lock = threading.Lock()
+
+        self.topics: Dict[str, Dict] = {}
+        self.chunk_topics: Dict[str, set] = {}
+        self.variants: Dict[Tuple[str, str, str, str], str] = {}
+        self._load()
+
+    def _load(self):
+        with self.lock:
+            for topic_id, title, source_version, embeddings, chunks in self.conn.execute(
+                "SELECT topic_id, title, source_version, embeddings, chunks FROM topics"
+            ):
+                self._set_topic(topic_id, {
+                    "title": title,
+                    "source_version": source_version,
+                    "embeddings": json.loads(embeddings),
+                    "chunks": set(json.loads(chunks)),
+                })
+            for topic_id, source_version, level, preference, content in self.conn.execute(
+                "SELECT topic_id, source_version, knowledge_level, learning_preference, content FROM variants"
+            ):
+                self.variants[(topic_id, source_version, level, preference)] = content
+
+    def _set_topic(self, topic_id: str, topic: Dict):
+        for chunk in self.topics.get(topic_id, {}).get("chunks", ()):
+            self.chunk_topics.get(chunk, set()).discard(topic_id)
+        self.topics[topic_id] = topic
+        for chunk in topic["chunks"]:
+            self.chunk_topics.setdefault(chunk, set()).add(topic_id)
+
+    def save_topic(self, topic_id: str, title: str, source_version: str, embeddings: List[float], chunks: List[str]):
+        """Grava o tópico com os ids dos chunks que o contexto da seção cobre"""
+        with self.lock:
+            self._set_topic(topic_id, {"title": title, "source_version": source_version, "embeddings": embeddings, "chunks": set(chunks)})
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO topics (topic_id, title, source_version, embeddings, chunks) VALUES (?, ?, ?, ?, ?)",
+                    (topic_id, title, source_version, json.dumps(embeddings), json.dumps(list(chunks)))
+                )
+                self.conn.execute(
+                    "DELETE FROM variants WHERE topic_id = ? AND source_version != ?",
+                    (topic_id, source_version)
+                )
+            self.variants = {
+                key: content for key, content in self.variants.items()
+                if key[0] != topic_id or key[1] == source_version
+            }
+
+    def save_variants(self, rows: List[Tuple[str, str, str, str, str]]):
+        """Grava em lote linhas (topic_id, source_version, nível, preferência, conteúdo)"""
+        now = time.time()
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO variants "
+                    "(topic_id, source_version, knowledge_level, learning_preference, content, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [row + (now,) for row in rows]
+                )
+            for topic_id, source_version, level, preference, content in rows:
+                self.variants[(topic_id, source_version, level, preference)] = content
+
+    def has_variant(self, topic_id: str, source_version: str, knowledge_level: str, learning_preference: str) -> bool:
+        return (topic_id, source_version, knowledge_level, learning_preference) in self.variants
+
+    def match(self, query_embeddings: List[float], user_profile: Dict, retrieved_docs: List[Dict]) -> Optional[str]:
+        """Retorna a variante do tópico mais próximo da consulta, se ela ainda for atual.
+
+        Só são candidatas seções da fonte do chunk mais bem ranqueado, na versão recuperada
+        agora, cujo contexto cobre todos os chunks recuperados dessa fonte.
+        """
+        docs = [doc for doc in retrieved_docs if "id" in doc]
+        if not docs:
+            return None
+        source_id, source_version = document_source(docs[0])
+        retrieved_chunks = {chunk_key(doc) for doc in docs if document_source(doc)[0] == source_id}
+        candidates = self.chunk_topics.get(chunk_key(docs[0]), set())
+
+        level = user_profile.get("knowledge_level", "iniciante")
+        preference = user_profile.get("learning_preference", "texto")
+
+        best_score, best_content = self.match_threshold, None
+        for topic_id in list(candidates):
+            topic = self.topics[topic_id]
+            if topic["source_version"] != source_version or not retrieved_chunks <= topic["chunks"]:
+                continue
+            content = self.variants.get((topic_id, source_version, level, preference))
+            if content is None:
+                continue
+            score = cosine_similarity(query_embeddings, topic["embeddings"])
+            if score >= best_score:
+                best_score, best_content = score, content
+        return best_content
+
+
+_default_store: Optional[VariantStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_variant_store() -> VariantStore:
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = VariantStore()
+        return _default_store
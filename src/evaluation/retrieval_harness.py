@@ -0,0 +1,280 @@
+import argparse
+import json
+import mimetypes
+import statistics
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+os.environ.setdefault("ELASTICSEARCH_URL", "http://localhost:9200")
+
+from src.core.indexer import Indexer, concrete_indices
+from src.core.lexical_index import LexicalIndex
+from src.core.retriever import Retriever, RETRIEVAL_MODES
+from src.core.hashing_embedder import HashingEmbeddingEngine
+from src.processors.base_processor import file_digest
+from src.processors.pdf_processor import PDFProcessor
+from src.processors.text_processor import TextProcessor
+
+EVALUATION_DIR = os.path.dirname(os.path.abspath(__file__))
+RESOURCES_DIR = os.path.abspath(os.path.join(EVALUATION_DIR, '..', '..', 'resources'))
+QUERIES_PATH = os.path.join(EVALUATION_DIR, "queries.json")
+BASELINE_PATH = os.path.join(EVALUATION_DIR, "baseline.json")
+
+DEFAULT_TOLERANCES = {
+    "recall_drop": 0.02,
+    "mrr_drop": 0.02,
+    "latency_ratio": 3.0,
+    "latency_slack_ms": 2.0,
+    "bytes_ratio": 1.1,
+}
+
+
+class TransferCounter:
+    def __init__(self):
+        self.bytes = 0
+
+    def add(self, payload):
+        self.bytes += len(payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+
+class CountingEmbeddingEngine:
+    """Contabiliza o volume que a chamada de embeddings trafegaria"""
+
+    def __init__(self, engine, counter: TransferCounter):
+        self.engine = engine
+        self.counter = counter
+        self.dimensions = getattr(engine, "dimensions", None)
+
+    def generate_embeddings(self, text: str) -> list[float]:
+        embeddings = self.engine.generate_embeddings(text)
+        self.counter.add(text.encode("utf-8"))
+        self.counter.add(embeddings)
+        return embeddings
+
+    def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        embeddings = self.engine.generate_embeddings_batch(texts)
+        self.counter.add(texts)
+        self.counter.add(embeddings)
+        return embeddings
+
+
+class CountingElasticsearch:
+    """Envolve o cliente do Elasticsearch contabilizando corpo de requisição e resposta das buscas"""
+
+    def __init__(self, es, counter: TransferCounter):
+        self.es = es
+        self.counter = counter
+
+    def options(self, **kwargs):
+        return CountingElasticsearch(self.es.options(**kwargs), self.counter)
+
+    def search(self, **kwargs):
+        response = self.es.search(**kwargs)
+        self.counter.add(kwargs.get("body", {}))
+        self.counter.add(response.body)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.es, name)
+
+
+def iter_resources(resources_dir: str = RESOURCES_DIR, remote_processors: bool = False) -> Iterator[Tuple[str, Iterator[str], Dict]]:
+    """Extrai `resources/` em fluxo com os mesmos processadores usados pela aplicação"""
+    for filename in sorted(os.listdir(resources_dir)):
+        path = os.path.join(resources_dir, filename)
+        mime_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        if mime_type in ("text/plain", "application/json"):
+            pieces = TextProcessor().iter_text(path)
+        elif mime_type == "application/pdf":
+            pieces = PDFProcessor().iter_text(path)
+        elif remote_processors and mime_type.startswith("image/"):
+            from src.processors.image_processor import ImageProcessor
+            pieces = ImageProcessor().iter_text(path, mime_type)
+        elif remote_processors and (mime_type.startswith("video/") or mime_type.startswith("audio/")):
+            from src.processors.audio_processor import AudioProcessor
+            pieces = AudioProcessor().iter_text(path)
+        else:
+            print(f"Ignorando {filename} ({mime_type}): requer processador remoto")
+            continue
+
+        metadata = {
+            "filename": filename,
+            "type": mime_type,
+            "size": os.path.getsize(path),
+            "source_version": file_digest(path)
+        }
+        yield filename, pieces, metadata
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def passage_hits(doc: Dict, relevant: List[Dict]) -> set:
+    """Índices das passagens relevantes contidas no chunk `doc`.
+
+    Cada passagem é rotulada pela fonte e por um trecho do texto; um chunk a acerta
+    quando vem da mesma fonte e contém o trecho.
+    """
+    source_id = doc.get("metadata", {}).get("source_id", doc["id"])
+    content = normalize_text(doc.get("content", ""))
+    return {
+        i for i, passage in enumerate(relevant)
+        if passage["source"] == source_id and normalize_text(passage["contains"]) in content
+    }
+
+
+def evaluate_mode(retriever: Retriever, mode: str, queries: List[Dict], k: int, counter: TransferCounter) -> Dict:
+    """recall@k e MRR sobre os k primeiros chunks, com rótulos no nível da passagem"""
+    recalls, reciprocal_ranks, latencies = [], [], []
+    counter.bytes = 0
+    for item in queries:
+        relevant = item["relevant"]
+        started = time.perf_counter()
+        results = retriever.retrieve_documents(item["query"], size=k, mode=mode)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        hits = [passage_hits(doc, relevant) for doc in results[:k]]
+        recalls.append(len(set().union(*hits)) / len(relevant))
+        reciprocal_ranks.append(next((1 / rank for rank, hit in enumerate(hits, 1) if hit), 0.0))
+
+    latencies.sort()
+    return {
+        "recall_at_k": round(statistics.mean(recalls), 4),
+        "mrr": round(statistics.mean(reciprocal_ranks), 4),
+        "latency_mean_ms": round(statistics.mean(latencies), 3),
+        "latency_p50_ms": round(latencies[len(latencies) // 2], 3),
+        "latency_p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+        "bytes_per_query": round(counter.bytes / len(queries)),
+    }
+
+
+def run(modes: List[str], k: int, queries: List[Dict], remote_processors: bool = False) -> Dict[str, Dict]:
+    counter = TransferCounter()
+    embedder = CountingEmbeddingEngine(HashingEmbeddingEngine(), counter)
+    lexical_index = LexicalIndex()
+
+    index_name = f"eval-{uuid.uuid4().hex[:12]}"
+    indexer = Indexer(index_name=index_name, rag_engine=embedder, lexical_index=lexical_index)
+    retriever = Retriever(lexical_index=lexical_index, lexical_fallback=False, index_name=index_name, rag_engine=embedder)
+
+    es_modes = [mode for mode in modes if mode != "lexical"]
+    if es_modes and not retriever.es.ping():
+        print(f"Elasticsearch indisponível em {os.getenv('ELASTICSEARCH_URL')}; modos não avaliados: {', '.join(es_modes)}")
+        modes = [mode for mode in modes if mode == "lexical"]
+        es_modes = []
+
+    results = {}
+    try:
+        for source_id, pieces, metadata in iter_resources(remote_processors=remote_processors):
+            if es_modes:
+                indexer.index_stream(source_id, pieces, metadata)
+            else:
+                for action in indexer.iter_actions(source_id, pieces, metadata):
+                    lexical_index.add(action["_id"], action["_source"]["content"], action["_source"]["metadata"])
+        if es_modes:
+            retriever.es.indices.refresh(index=index_name)
+            retriever.es = CountingElasticsearch(retriever.es, counter)
+
+        for mode in modes:
+            results[mode] = evaluate_mode(retriever, mode, queries, k, counter)
+    finally:
+        if es_modes:
+            for index in concrete_indices(retriever.es, index_name):
+                retriever.es.indices.delete(index=index, ignore_unavailable=True)
+    return results
+
+
+def find_regressions(results: Dict[str, Dict], baseline: Dict, modes: List[str] = None) -> List[str]:
+    """Falhas em relação ao baseline; modo pedido sem baseline ou não avaliado também falha"""
+    tolerances = {**DEFAULT_TOLERANCES, **baseline.get("tolerances", {})}
+    regressions = []
+    for mode in modes or list(results):
+        current = results.get(mode)
+        expected = baseline.get("modes", {}).get(mode)
+        if current is None:
+            regressions.append(f"{mode}: não avaliado")
+            continue
+        if expected is None:
+            regressions.append(f"{mode}: sem baseline (gere com --update-baseline --modes {mode})")
+            continue
+        if current["recall_at_k"] < expected["recall_at_k"] - tolerances["recall_drop"]:
+            regressions.append(f"{mode}: recall@k {current['recall_at_k']} < {expected['recall_at_k']}")
+        if current["mrr"] < expected["mrr"] - tolerances["mrr_drop"]:
+            regressions.append(f"{mode}: MRR {current['mrr']} < {expected['mrr']}")
+        latency_limit = expected["latency_p95_ms"] * tolerances["latency_ratio"] + tolerances["latency_slack_ms"]
+        if current["latency_p95_ms"] > latency_limit:
+            regressions.append(f"{mode}: latência p95 {current['latency_p95_ms']}ms > {latency_limit:.3f}ms")
+        bytes_limit = expected["bytes_per_query"] * tolerances["bytes_ratio"]
+        if current["bytes_per_query"] > bytes_limit:
+            regressions.append(f"{mode}: {current['bytes_per_query']} bytes/consulta > {bytes_limit:.0f}")
+    return regressions
+
+
+def print_report(results: Dict[str, Dict], k: int):
+    print(f"{'modo':<10} {'recall@' + str(k):>9} {'MRR':>7} {'média ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'bytes/consulta':>15}")
+    for mode, metrics in results.items():
+        print(
+            f"{mode:<10} {metrics['recall_at_k']:>9.3f} {metrics['mrr']:>7.3f} {metrics['latency_mean_ms']:>9.3f} "
+            f"{metrics['latency_p50_ms']:>8.3f} {metrics['latency_p95_ms']:>8.3f} {metrics['bytes_per_query']:>15}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Avaliação de qualidade e desempenho do Retriever sobre resources/")
+    parser.add_argument("--modes", default=None, help="modos do Retriever, separados por vírgula (padrão: os do baseline)")
+    parser.add_argument("--k", type=int, default=None, help="tamanho do ranking avaliado (padrão: o do baseline)")
+    parser.add_argument("--queries", default=QUERIES_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="grava as métricas atuais como novo baseline")
+    parser.add_argument("--remote-processors", action="store_true", help="inclui imagens e vídeos (usa Gemini/Whisper)")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    k = args.k or baseline.get("k", 3)
+
+    with open(args.queries, encoding="utf-8") as f:
+        queries = json.load(f)
+
+    if args.modes:
+        modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    else:
+        modes = [mode for mode in RETRIEVAL_MODES if mode in baseline.get("modes", {})] or list(RETRIEVAL_MODES)
+        missing = [mode for mode in RETRIEVAL_MODES if mode not in modes]
+        if missing:
+            print(f"Modos sem baseline, não avaliados: {', '.join(missing)} (use --modes para avaliá-los)")
+    results = run(modes, k, queries, args.remote_processors)
+    print_report(results, k)
+
+    if args.update_baseline:
+        missing = [mode for mode in modes if mode not in results]
+        if missing:
+            print(f"Baseline não atualizado: modos não avaliados: {', '.join(missing)}")
+            return 1
+        baseline_modes = {**baseline.get("modes", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"k": k, "tolerances": baseline.get("tolerances", DEFAULT_TOLERANCES), "modes": baseline_modes}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline atualizado em {args.baseline}")
+        return 0
+
+    if baseline and k != baseline.get("k"):
+        print(f"k={k} difere do baseline (k={baseline.get('k')}); regressões não verificadas")
+        return 1
+
+    regressions = find_regressions(results, baseline, modes)
+    for regression in regressions:
+        print(f"REGRESSÃO {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,32 @@
-from .base_processor import BaseProcessor
+from .base_processor import BaseProcessor, Source, file_digest, local_path
+from src.utils.api_client import get_api_client
+from typing import Iterator
 import openai
-import tempfile
-import os
+
+TRANSCRIPTION_MODEL = "whisper-1"
 
 class AudioProcessor(BaseProcessor):
     def __init__(self):
-        self.openai_client = openai.OpenAI()
+        self.openai_client = openai.OpenAI(max_retries=0)
+        self.api_client = get_api_client()
+
+    def _transcribe(self, file_path: str):
+        with open(file_path, "rb") as audio:
+            return self.openai_client.audio.transcriptions.create(
+                model=TRANSCRIPTION_MODEL,
+                file=audio
+            )
 
-    def process(self, file_content: bytes) -> str:
+    def iter_text(self, source: Source) -> Iterator[str]:
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp_file:
-                tmp_file.write(file_content)
-                tmp_file_path = tmp_file.name
-            
-            with open(tmp_file_path, "rb") as audio:
-                transcript = self.openai_client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio
+            digest = file_digest(source)
+            with local_path(source, suffix=".mp4") as file_path:
+                transcript = self.api_client.call(
+                    TRANSCRIPTION_MODEL,
+                    self._transcribe,
+                    file_path,
+                    coalesce_key=digest
                 )
-            
-            os.unlink(tmp_file_path)
-            
-            return transcript.text
+            yield transcript.text
         except Exception as e:
             print(f"Erro ao transcrever áudio: {e}")
-            return ""
-
-
@@ -1,5 +1,67 @@
-class BaseProcessor:
-    def process(self, file_path: str) -> str:
-        raise NotImplementedError
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Union
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from config.settings import STREAM_BLOCK_SIZE
+
+Source = Union[str, os.PathLike, bytes, bytearray, BinaryIO]
+
+
+def is_path(source: Source) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
 
+@contextmanager
+def open_binary(source: Source) -> Iterator[BinaryIO]:
+    """Abre caminho, bytes ou arquivo já aberto como um objeto binário legível"""
+    if is_path(source):
+        with open(source, "rb") as f:
+            yield f
+    elif isinstance(source, (bytes, bytearray)):
+        yield io.BytesIO(source)
+    else:
+        if source.seekable():
+            source.seek(0)
+        yield source
 
+
+def file_digest(source: Source) -> str:
+    """SHA-256 do conteúdo lido em blocos, sem carregar o arquivo inteiro"""
+    digest = hashlib.sha256()
+    with open_binary(source) as f:
+        while block := f.read(STREAM_BLOCK_SIZE):
+            digest.update(block)
+        if f.seekable():
+            f.seek(0)
+    return digest.hexdigest()[:16]
+
+
+@contextmanager
+def local_path(source: Source, suffix: str = "") -> Iterator[str]:
+    """Caminho em disco para a fonte; copia em blocos para um arquivo temporário se preciso"""
+    if is_path(source):
+        yield os.fspath(source)
+        return
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        with open_binary(source) as f:
+            shutil.copyfileobj(f, tmp_file, STREAM_BLOCK_SIZE)
+        tmp_file_path = tmp_file.name
+    try:
+        yield tmp_file_path
+    finally:
+        os.unlink(tmp_file_path)
+
+
+class BaseProcessor:
+    def process(self, file_path: Source) -> str:
+        return "".join(self.iter_text(file_path))
+
+    def iter_text(self, source: Source) -> Iterator[str]:
+        raise NotImplementedError
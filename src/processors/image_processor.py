@@ -1,23 +1,35 @@
-from .base_processor import BaseProcessor
+from .base_processor import BaseProcessor, Source, file_digest, open_binary
+from src.utils.api_client import get_api_client
+from typing import Iterator
 import google.generativeai as genai
-import base64
 import os
 
+VISION_MODEL = "gemini-1.5-flash"
+
 class ImageProcessor(BaseProcessor):
     def __init__(self):
         genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        self.gemini_vision_model = genai.GenerativeModel("gemini-1.5-flash")
+        self.gemini_vision_model = genai.GenerativeModel(VISION_MODEL)
+        self.api_client = get_api_client()
+
+    def process(self, file_content: Source, mime_type: str) -> str:
+        return "".join(self.iter_text(file_content, mime_type))
 
-    def process(self, file_content: bytes, mime_type: str) -> str:
+    def iter_text(self, source: Source, mime_type: str) -> Iterator[str]:
         try:
             prompt = "Extraia todo o texto visível nesta imagem e forneça também uma descrição detalhada do conteúdo visual."
-            response = self.gemini_vision_model.generate_content([
-                prompt,
-                {"mime_type": mime_type, "data": base64.b64encode(file_content).decode()}
-            ])
-            return response.text
+            digest = file_digest(source)
+            with open_binary(source) as f:
+                data = f.getvalue() if hasattr(f, "getvalue") else f.read()
+            response = self.api_client.call(
+                VISION_MODEL,
+                self.gemini_vision_model.generate_content,
+                [
+                    prompt,
+                    {"mime_type": mime_type, "data": data}
+                ],
+                coalesce_key=(mime_type, digest)
+            )
+            yield response.text
         except Exception as e:
             print(f"Erro ao extrair texto da imagem: {e}")
-            return ""
-
-
@@ -1,18 +1,32 @@
-from .base_processor import BaseProcessor
+from .base_processor import BaseProcessor, Source, is_path, local_path
+from typing import Iterator
 import pymupdf
-from io import BytesIO
+import io
 
 class PDFProcessor(BaseProcessor):
-    def process(self, file_content: bytes) -> str:
+    def _iter_pages(self, doc) -> Iterator[str]:
         try:
-            doc = pymupdf.open(stream=file_content, filetype="pdf")
-            text = ""
             for page in doc:
-                text += page.get_text()
+                yield page.get_text()
+        finally:
             doc.close()
-            return text
+
+    def process(self, file_path: Source) -> str:
+        try:
+            return super().process(file_path)
         except Exception as e:
             print(f"Erro ao extrair texto do PDF: {e}")
             return ""
 
-
+    def iter_text(self, source: Source) -> Iterator[str]:
+        """Texto página a página; uma falha no meio do arquivo é propagada, e não tratada
+        como fim do documento, para que a indexação não grave só o começo dele"""
+        if is_path(source):
+            yield from self._iter_pages(pymupdf.open(source))
+        elif isinstance(source, (bytes, bytearray)):
+            yield from self._iter_pages(pymupdf.open(stream=source, filetype="pdf"))
+        elif isinstance(source, io.BytesIO):
+            yield from self._iter_pages(pymupdf.open(stream=source.getbuffer(), filetype="pdf"))
+        else:
+            with local_path(source, suffix=".pdf") as path:
+                yield from self._iter_pages(pymupdf.open(path))
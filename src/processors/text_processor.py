@@ -1,8 +1,16 @@
-from .base_processor import BaseProcessor
-from streamlit.runtime.uploaded_file_manager import UploadedFile
+from .base_processor import BaseProcessor, Source, open_binary
+from config.settings import STREAM_BLOCK_SIZE
+from typing import Iterator
+import codecs
 
 class TextProcessor(BaseProcessor):
-    def process(self, uploaded_file: UploadedFile) -> str:
-        return uploaded_file.read().decode("utf-8")
-
-
+    def iter_text(self, source: Source) -> Iterator[str]:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        with open_binary(source) as f:
+            while block := f.read(STREAM_BLOCK_SIZE):
+                text = decoder.decode(block)
+                if text:
+                    yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
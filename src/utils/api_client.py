@@ -0,0 +1,228 @@
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from config.settings import (
+    API_MAX_RETRIES,
+    API_RETRY_BASE_DELAY,
+    API_RETRY_MAX_DELAY,
+    API_CIRCUIT_FAILURE_THRESHOLD,
+    API_CIRCUIT_RESET_TIMEOUT,
+    API_RATE_LIMITS,
+    API_DEFAULT_RATE_LIMIT
+)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {
+    "RateLimitError",
+    "APITimeoutError",
+    "APIConnectionError",
+    "InternalServerError",
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+}
+
+
+class CircuitOpenError(Exception):
+    """Levantada quando o circuito do modelo está aberto e a chamada não é feita"""
+
+
+class TokenBucket:
+    """Limitador de taxa por token bucket (thread-safe)"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, tokens: float = 1.0):
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Circuit breaker com estados fechado, aberto e meio-aberto"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.half_open_probe = False
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.half_open_probe:
+                raise CircuitOpenError("Circuito aberto: chamadas suspensas temporariamente")
+            self.half_open_probe = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.half_open_probe = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.half_open_probe or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.half_open_probe = False
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status_code = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status_code in RETRYABLE_STATUS_CODES:
+        return True
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class APIClient:
+    """Camada compartilhada de chamadas aos provedores (OpenAI, Gemini).
+
+    Aplica rate limiting por modelo, retentativas com backoff exponencial e jitter,
+    circuit breaker por modelo e coalescência de requisições idênticas em andamento.
+    """
+
+    def __init__(
+        self,
+        rate_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+        default_rate_limit: Tuple[float, int] = API_DEFAULT_RATE_LIMIT,
+        max_retries: int = API_MAX_RETRIES,
+        base_delay: float = API_RETRY_BASE_DELAY,
+        max_delay: float = API_RETRY_MAX_DELAY,
+        failure_threshold: int = API_CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = API_CIRCUIT_RESET_TIMEOUT
+    ):
+        self.rate_limits = rate_limits if rate_limits is not None else API_RATE_LIMITS
+        self.default_rate_limit = default_rate_limit
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.in_flight: Dict[Tuple[str, Hashable], Future] = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, model: str) -> TokenBucket:
+        with self.lock:
+            if model not in self.buckets:
+                rate, capacity = self.rate_limits.get(model, self.default_rate_limit)
+                self.buckets[model] = TokenBucket(rate, capacity)
+            return self.buckets[model]
+
+    def _breaker(self, model: str) -> CircuitBreaker:
+        with self.lock:
+            if model not in self.breakers:
+                self.breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self.breakers[model]
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _call_with_retries(self, model: str, fn: Callable, /, *args, **kwargs) -> Any:
+        bucket = self._bucket(model)
+        breaker = self._breaker(model)
+
+        attempt = 0
+        while True:
+            breaker.before_call()
+            bucket.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    # o provedor respondeu: um erro do próprio pedido não indica indisponibilidade
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt, e))
+                attempt += 1
+                continue
+            breaker.record_success()
+            return result
+
+    def call(self, model: str, fn: Callable, /, *args, coalesce_key: Hashable = None, **kwargs) -> Any:
+        """Executa `fn(*args, **kwargs)` sob as políticas do modelo.
+
+        Chamadas simultâneas com o mesmo `coalesce_key` compartilham uma única requisição.
+        """
+        if coalesce_key is None:
+            return self._call_with_retries(model, fn, *args, **kwargs)
+
+        key = (model, coalesce_key)
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.in_flight[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._call_with_retries(model, fn, *args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+
+
+_default_client: Optional[APIClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_api_client() -> APIClient:
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = APIClient()
+        return _default_client
@@ -0,0 +1,66 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from config.settings import PROFILING_HISTORY_SIZE
+
+RERUN_KEY = "rerun"
+
+
+class RerunProfiler:
+    """Mede a duração de cada rerun do app e das seções marcadas dentro dele.
+
+    Fora de um rerun iniciado com `start`, `section` não mede nada, então as marcações
+    podem ficar no código com o perfilamento desligado.
+    """
+
+    def __init__(self, history_size: int = PROFILING_HISTORY_SIZE):
+        self.reruns = deque(maxlen=history_size)
+        self.current: Optional[Dict[str, float]] = None
+        self.started_at = 0.0
+
+    def start(self):
+        self.current = {}
+        self.started_at = time.perf_counter()
+
+    @contextmanager
+    def section(self, name: str):
+        if self.current is None:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.current is not None:
+                self.current[name] = self.current.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+    def finish(self) -> Dict[str, float]:
+        if self.current is None:
+            return {}
+        record = {RERUN_KEY: (time.perf_counter() - self.started_at) * 1000, **self.current}
+        self.reruns.append(record)
+        self.current = None
+        return record
+
+    def summary(self) -> List[Dict]:
+        """Média, p95 e último valor (ms) de cada seção nos reruns guardados"""
+        names = []
+        for record in self.reruns:
+            names += [name for name in record if name not in names]
+        rows = []
+        for name in names:
+            values = sorted(record[name] for record in self.reruns if name in record)
+            rows.append({
+                "seção": name,
+                "reruns": len(values),
+                "média ms": round(sum(values) / len(values), 1),
+                "p95 ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 1),
+                "último ms": round(self.reruns[-1].get(name, 0.0), 1),
+            })
+        return rows
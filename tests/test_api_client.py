@@ -0,0 +1,36 @@
+import time
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.api_client import APIClient, CircuitOpenError
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+class ServiceUnavailableError(Exception):
+    status_code = 503
+
+
+def raise_error(error):
+    raise error
+
+
+def test_half_open_probe_with_non_retryable_error_closes_circuit():
+    client = APIClient(rate_limits={}, default_rate_limit=(1000.0, 1000), max_retries=0, failure_threshold=1, reset_timeout=0.05)
+
+    with pytest.raises(ServiceUnavailableError):
+        client.call("modelo", raise_error, ServiceUnavailableError())
+    with pytest.raises(CircuitOpenError):
+        client.call("modelo", lambda: "ok")
+
+    time.sleep(0.06)
+    with pytest.raises(BadRequestError):
+        client.call("modelo", raise_error, BadRequestError())
+
+    assert client.call("modelo", lambda: "ok") == "ok"
@@ -0,0 +1,83 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("ELASTICSEARCH_URL", "http://localhost:9200")
+
+from src.ai.conversation import ConversationSession
+from src.core.lexical_index import LexicalIndex
+from src.core.retriever import Retriever
+
+
+class UnavailableEmbeddings:
+    def generate_embeddings(self, text):
+        return []
+
+
+def test_retrieve_falls_back_to_lexical_index_without_embeddings():
+    lexical_index = LexicalIndex()
+    lexical_index.add("tabelas#0", "Tabelas em HTML usam colspan para mesclar colunas", {"type": "text/plain"})
+    retriever = Retriever(lexical_index=lexical_index, index_name="teste", rag_engine=UnavailableEmbeddings())
+
+    results = ConversationSession(retriever).retrieve("como mesclar colunas de tabela")
+
+    assert [doc["id"] for doc in results] == ["tabelas#0"]
+
+
+class FixedRetriever:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, query):
+        return [1.0, 0.0]
+
+    def retrieve_documents(self, query, content_type=None, query_embeddings=None, size=5, courses=None):
+        self.calls += 1
+        return [{"id": "tabelas#0", "content": "colspan", "embeddings": [1.0, 0.0]}]
+
+
+def test_follow_ups_count_consecutive_reuses_of_the_same_topic():
+    retriever = FixedRetriever()
+    conversation = ConversationSession(retriever)
+
+    conversation.retrieve("tabelas")
+    assert (conversation.last_turn_reused, conversation.follow_ups) == (False, 0)
+    conversation.retrieve("e o colspan?")
+    conversation.retrieve("não entendi o colspan")
+    assert (conversation.last_turn_reused, conversation.follow_ups) == (True, 2)
+
+    conversation.retrieve("tabelas", content_type="application/pdf")
+    assert (retriever.calls, conversation.follow_ups) == (2, 0)
+
+
+class FlakyEmbeddingsRetriever(FixedRetriever):
+    def __init__(self):
+        super().__init__()
+        self.embeddings_available = True
+
+    def embed_query(self, query):
+        return [1.0, 0.0] if self.embeddings_available else []
+
+    def fallback_search(self, query, content_type=None, size=5, courses=None):
+        return [{"id": "listas#0", "content": "ol"}]
+
+
+def test_lexical_fallback_turn_does_not_keep_previous_topic_state():
+    retriever = FlakyEmbeddingsRetriever()
+    conversation = ConversationSession(retriever)
+    conversation.retrieve("tabelas")
+    conversation.retrieve("e o colspan?")
+    assert conversation.last_turn_reused
+
+    retriever.embeddings_available = False
+    results = conversation.retrieve("listas ordenadas")
+
+    assert [doc["id"] for doc in results] == ["listas#0"]
+    assert conversation.last_turn_fallback
+    assert (conversation.last_turn_reused, conversation.follow_ups, conversation.topic_embeddings) == (False, 0, [])
+
+    retriever.embeddings_available = True
+    conversation.retrieve("tabelas")
+    assert not conversation.last_turn_fallback and not conversation.last_turn_reused
+    assert retriever.calls == 2
@@ -0,0 +1,57 @@
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("ELASTICSEARCH_URL", "http://localhost:9200")
+
+from src.core import indexer as indexer_module
+from src.core.hashing_embedder import HashingEmbeddingEngine
+from src.core.indexer import Indexer, IndexingError
+from src.core.lexical_index import LexicalIndex
+
+
+def bulk_rejecting(rejected_ids):
+    def streaming_bulk(es, actions, chunk_size, raise_on_error):
+        for action in actions:
+            if action["_id"] in rejected_ids:
+                yield False, {"index": {"_id": action["_id"], "status": 429, "error": "rejeitado"}}
+            else:
+                yield True, {"index": {"_id": action["_id"], "status": 201}}
+    return streaming_bulk
+
+
+@pytest.fixture
+def indexer(monkeypatch):
+    indexer = Indexer(index_name="teste", rag_engine=HashingEmbeddingEngine(), lexical_index=LexicalIndex())
+    indexer.removed = []
+    monkeypatch.setattr(indexer, "_ensure_index", lambda index: None)
+    monkeypatch.setattr(indexer, "_remove_stale_chunks", lambda *args: indexer.removed.append(args))
+    return indexer
+
+
+def test_only_confirmed_chunks_reach_the_lexical_index(indexer, monkeypatch):
+    monkeypatch.setattr(indexer_module, "streaming_bulk", bulk_rejecting({"aula.txt#1"}))
+    pieces = ["Tabelas usam colspan. " * 150, "Listas ordenadas usam ol. " * 150]
+
+    with pytest.raises(IndexingError) as error:
+        indexer.index_stream("aula.txt", pieces, {"source_version": "v1"})
+
+    assert "aula.txt#1" not in indexer.lexical_index.documents
+    assert len(indexer.lexical_index) == error.value.indexed > 0
+    assert indexer.removed == []
+
+
+def test_extraction_failure_midway_is_not_a_complete_ingest(indexer, monkeypatch):
+    monkeypatch.setattr(indexer_module, "streaming_bulk", bulk_rejecting(set()))
+
+    def pieces():
+        yield "Página 1 sobre tabelas. " * 150
+        raise RuntimeError("página corrompida")
+
+    with pytest.raises(IndexingError):
+        indexer.index_stream("aula.pdf", pieces(), {"source_version": "v2"})
+
+    assert indexer.removed == []
@@ -0,0 +1,45 @@
+import threading
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.lexical_index import LexicalIndex
+
+
+def test_remove_stale_chunks_drops_old_version_and_trailing_chunks():
+    index = LexicalIndex()
+    for chunk in range(3):
+        index.add(f"aula.txt#{chunk}", f"conteúdo antigo {chunk}", {"source_id": "aula.txt", "source_version": "v1", "chunk": chunk})
+    index.add("outra.txt#0", "outra fonte", {"source_id": "outra.txt", "source_version": "v1", "chunk": 0})
+    index.add("aula.txt#0", "conteúdo novo", {"source_id": "aula.txt", "source_version": "v2", "chunk": 0})
+
+    removed = index.remove_stale_chunks("aula.txt", "v2", 1)
+
+    assert removed == 2
+    assert sorted(index.documents) == ["aula.txt#0", "outra.txt#0"]
+
+
+def test_concurrent_saves_leave_a_complete_file(tmp_path):
+    path = tmp_path / "lexical_index.json"
+    index = LexicalIndex(str(path))
+    for chunk in range(50):
+        index.add(f"aula.txt#{chunk}", f"conteúdo {chunk}", {"source_id": "aula.txt", "chunk": chunk})
+    errors = []
+
+    def save_many():
+        try:
+            for _ in range(20):
+                index.save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save_many) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert os.listdir(tmp_path) == ["lexical_index.json"]
+    assert len(LexicalIndex(str(path))) == 50
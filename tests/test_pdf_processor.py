@@ -0,0 +1,51 @@
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.processors import pdf_processor
+from src.processors.pdf_processor import PDFProcessor
+
+
+class Page:
+    def __init__(self, number):
+        self.number = number
+
+    def get_text(self):
+        if self.number == 3:
+            raise RuntimeError("página corrompida")
+        return f"página {self.number}\n"
+
+
+class Document:
+    def __init__(self):
+        self.closed = False
+
+    def __iter__(self):
+        return iter(Page(number) for number in range(1, 6))
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def corrupt_pdf(monkeypatch):
+    document = Document()
+    monkeypatch.setattr(pdf_processor.pymupdf, "open", lambda *args, **kwargs: document)
+    return document
+
+
+def test_iter_text_propagates_failure_partway_through(corrupt_pdf):
+    pieces = []
+    with pytest.raises(RuntimeError):
+        for piece in PDFProcessor().iter_text(b"%PDF"):
+            pieces.append(piece)
+
+    assert pieces == ["página 1\n", "página 2\n"]
+    assert corrupt_pdf.closed
+
+
+def test_process_keeps_returning_empty_text_on_failure(corrupt_pdf):
+    assert PDFProcessor().process(b"%PDF") == ""
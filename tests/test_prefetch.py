@@ -0,0 +1,57 @@
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.prefetch import RetrievalPrefetcher
+
+
+class SlowRetriever:
+    mode = "hybrid"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.embedding_calls = 0
+        self.released = threading.Event()
+
+    def embed_query(self, query):
+        self.embedding_calls += 1
+        return [1.0, float(len(query))]
+
+    def retrieve_documents(self, query, content_type=None, query_embeddings=None, size=5, mode=None, courses=None):
+        self.released.wait(self.delay)
+        return [{"id": query}]
+
+
+def wait_started(prefetcher):
+    while prefetcher.pending is not None and prefetcher.pending.future is None:
+        time.sleep(0.005)
+
+
+def test_take_does_not_wait_for_unfinished_prefetch_of_other_text():
+    retriever = SlowRetriever(delay=5.0)
+    prefetcher = RetrievalPrefetcher(retriever, debounce=0.01)
+    prefetcher.prefetch("tabelas em html")
+    wait_started(prefetcher)
+
+    started = time.perf_counter()
+    query_embeddings, documents = prefetcher.take("seletores de css")
+    retriever.released.set()
+
+    assert documents is None and query_embeddings is None
+    assert time.perf_counter() - started < 0.5
+
+
+def test_lexical_prefetch_never_calls_embeddings():
+    retriever = SlowRetriever()
+    prefetcher = RetrievalPrefetcher(retriever, debounce=0.01)
+    prefetcher.prefetch("tabelas em html", mode="lexical")
+    wait_started(prefetcher)
+
+    query_embeddings, documents = prefetcher.take("Tabelas  em HTML", mode="lexical")
+
+    assert documents == [{"id": "tabelas em html"}]
+    assert query_embeddings is None
+    assert retriever.embedding_calls == 0
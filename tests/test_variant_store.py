@@ -0,0 +1,44 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.variant_store import VariantStore
+
+PROFILE = {"knowledge_level": "iniciante", "learning_preference": "texto"}
+
+
+def chunk(number, version="v1"):
+    return {"id": f"livro.pdf#{number}", "content": "...", "metadata": {"source_id": "livro.pdf", "source_version": version, "chunk": number}}
+
+
+def make_store(tmp_path):
+    store = VariantStore(str(tmp_path / "variants.db"), match_threshold=0.5)
+    store.save_topic("livro.pdf@0", "Livro (parte 1)", "v1", [1.0, 0.0], ["livro.pdf#0", "livro.pdf#1"])
+    store.save_topic("livro.pdf@2", "Livro (parte 2)", "v1", [1.0, 0.0], ["livro.pdf#2", "livro.pdf#3"])
+    store.save_variants([
+        ("livro.pdf@0", "v1", "iniciante", "texto", "explicação da abertura"),
+        ("livro.pdf@2", "v1", "iniciante", "texto", "explicação das tabelas"),
+    ])
+    return store
+
+
+def test_match_serves_the_section_covering_the_retrieved_chunks(tmp_path):
+    store = make_store(tmp_path)
+
+    assert store.match([1.0, 0.0], PROFILE, [chunk(3), chunk(2)]) == "explicação das tabelas"
+    assert store.match([1.0, 0.0], PROFILE, [chunk(0)]) == "explicação da abertura"
+
+
+def test_match_skips_sections_that_do_not_cover_every_retrieved_chunk(tmp_path):
+    store = make_store(tmp_path)
+
+    assert store.match([1.0, 0.0], PROFILE, [chunk(1), chunk(2)]) is None
+    assert store.match([1.0, 0.0], PROFILE, [chunk(2, version="v2")]) is None
+
+
+def test_topics_and_coverage_survive_reload(tmp_path):
+    make_store(tmp_path).conn.close()
+    store = VariantStore(str(tmp_path / "variants.db"), match_threshold=0.5)
+
+    assert store.match([1.0, 0.0], PROFILE, [chunk(2)]) == "explicação das tabelas"